@@ -4,8 +4,6 @@ set -euo pipefail
 # navigate to the current directory
 cd "$(dirname "$0")"
 
-# build python package
-"${PYTHON:=python}" -m version add ${1}
-
+# build python package, the version is injected while building: no file of the project is rewritten
 echo build package
-poetry build --format wheel
+"${PYTHON:=python}" -m version build ${1} --format wheel
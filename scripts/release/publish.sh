@@ -3,6 +3,7 @@ set -euo pipefail
 
 DISALLOW_LOCAL_VERSIONS=${DISALLOW_LOCAL_VERSIONS:-"true"}
 REPOSITORY=${REPOSITORY:-""}
+REPOSITORY_URL=${REPOSITORY_URL:-""}
 PUBLISH=${PUBLISH:-"false"}
 
 # navigate to the current directory
@@ -26,11 +27,20 @@ fi
 if [[ "$CURRENT_VERSION" != "" ]]
 then
   echo publish package "$(if [[ "$PUBLISH" != "true" ]]; then echo "in dry-run mode"; fi)"
-  PUBLISH_ARGS=" --username $REPOSITORY_USERNAME --password $REPOSITORY_PASSWORD"
-  if [[ "$REPOSITORY" != "" ]]; then PUBLISH_ARGS+=" --repository $REPOSITORY"; fi
-  if [[ "$PUBLISH" != "true" ]]; then PUBLISH_ARGS+=" --dry-run"; fi
-
-  poetry publish $PUBLISH_ARGS
+  if [[ "$REPOSITORY_URL" != "" ]]
+  then
+    # concurrent upload with retries, credentials are read from the environment
+    PUBLISH_ARGS=" --repository-url $REPOSITORY_URL"
+    if [[ "$PUBLISH" != "true" ]]; then PUBLISH_ARGS+=" --dry-run"; fi
+
+    "${PYTHON:=python}" -m version publish $PUBLISH_ARGS
+  else
+    PUBLISH_ARGS=" --username $REPOSITORY_USERNAME --password $REPOSITORY_PASSWORD"
+    if [[ "$REPOSITORY" != "" ]]; then PUBLISH_ARGS+=" --repository $REPOSITORY"; fi
+    if [[ "$PUBLISH" != "true" ]]; then PUBLISH_ARGS+=" --dry-run"; fi
+
+    poetry publish $PUBLISH_ARGS
+  fi
 
 else
   echo the package will not be published because no version was provided.
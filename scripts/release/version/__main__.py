@@ -1,10 +1,32 @@
-from argparse import ArgumentParser
-from typing import Optional
+"""
+The command line of the tool. The commands are looked up on the _version package when they run, which imports only the
+modules of the command run.
+"""
+from __future__ import annotations
+
+from argparse import ArgumentParser, FileType
+import json
+import os
+from pathlib import Path
+import sys
+from typing import Iterable, Optional, TextIO, TYPE_CHECKING
 
 from git import Repo
 from poetry.core.semver import Version
 
-from ._version import add_version_to_project, get_version, tag_version, PROJECT_DIR
+from . import _version
+from ._version._config import (
+    AUDIT_CHUNK_SIZE,
+    BUILD_FORMATS,
+    HASH_SIZE,
+    PROJECT_DIR,
+    PUBLISH_REPOSITORY_URL,
+    VERSION_REGISTRY_PATH,
+    ZIPAPP_PATH,
+)
+
+if TYPE_CHECKING:
+    from ._version import BranchVersion, ResolutionRecord, TagAuditReport, UploadResult
 
 
 def optional(func):
@@ -20,6 +42,94 @@ def print_version(version: Optional[Version]) -> None:
     print(version.text if version else "")
 
 
+def print_branch_versions(branch_versions: Iterable[BranchVersion]) -> None:
+    for branch_version in branch_versions:
+        record = {
+            "branch": branch_version.branch,
+            "commit": branch_version.commit_sha,
+            "stage": branch_version.stage.value if branch_version.stage else None,
+            "version": branch_version.version.text if branch_version.version else None,
+            "error": branch_version.error,
+        }
+        print(json.dumps(record))
+
+
+def print_listed_versions(listing: TextIO, branch: Optional[str], commit_sha: Optional[str]) -> None:
+    from ._version._providers import ProvideVersionError
+
+    try:
+        listed_versions = _version.get_listed_versions(listing, branch=branch, commit_sha=commit_sha)
+    except ProvideVersionError as e:
+        # f.ex. git ls-remote --tags lists neither HEAD nor branches: the commit must be provided
+        error = {"branch": branch, "commit": commit_sha, "current": None, "latest": None, "next": None, "error": str(e)}
+        print(json.dumps(error))
+        return
+    record = {
+        "branch": listed_versions.branch,
+        "commit": listed_versions.commit_sha,
+        "current": listed_versions.current_version.text if listed_versions.current_version else None,
+        "latest": listed_versions.latest_version.text if listed_versions.latest_version else None,
+        "next": listed_versions.next_version.text if listed_versions.next_version else None,
+        "error": listed_versions.error,
+    }
+    print(json.dumps(record))
+
+
+def print_upload_results(results: Iterable[UploadResult]) -> None:
+    failed = False
+    for result in results:
+        error = f": {result.error}" if result.error else ""
+        print(
+            f"{result.status.value:<8} {result.path.name} {result.size / 1e6:.2f}MB in {result.seconds:.2f}s "
+            f"({result.throughput / 1e6:.2f}MB/s, {result.attempts} attempt(s)){error}"
+        )
+        failed = failed or result.status == _version.UploadStatus.FAILED
+    if failed:
+        sys.exit(1)
+
+
+def sync_version_registry(repo: Repo, registry_path: Path, package: Optional[str]) -> None:
+    with _version.VersionRegistry(registry_path) as registry:
+        print(_version.sync_registry(repo, registry, package or _version.get_project_name()))
+
+
+def print_record(record: ResolutionRecord, output_path: Optional[Path]) -> None:
+    if output_path:
+        output_path.write_text(record.to_json())
+    else:
+        print(record.to_json())
+
+
+def print_replays(record_paths: Iterable[Path]) -> None:
+    mismatch = False
+    for record_path in record_paths:
+        record = _version.ResolutionRecord.from_json(record_path.read_text())
+        replay = _version.replay_resolution(record)
+        matches = (replay.version, replay.error) == (record.version, record.error)
+        outcome = replay.version.text if replay.version else replay.error
+        print(f"{'ok' if matches else 'mismatch':<8} {record_path} {outcome}")
+        mismatch = mismatch or not matches
+    if mismatch:
+        sys.exit(1)
+
+
+def build_version_zipapp(output_path: Path, interpreter: str, compress: bool, runs: int) -> None:
+    _version.build_zipapp(output_path, interpreter=interpreter, compress=compress)
+    print(f"{output_path} {output_path.stat().st_size / 1e6:.2f}MB")
+    if runs > 0:
+        cold_start = _version.measure_cold_start(output_path, runs=runs)
+        command = " ".join(cold_start.command[1:])
+        print(f"cold start of: {command} best {cold_start.best:.3f}s median {cold_start.median:.3f}s")
+
+
+def print_audit_report(report: TagAuditReport) -> None:
+    for audit in report.issues:
+        print(f"{audit.issue.value:<15} {audit.tag} {audit.commit_sha[:HASH_SIZE]} {audit.detail}")
+    print(f"{report.n_tags} tag(s), {report.n_version_tags} version tag(s), {len(report.issues)} issue(s)")
+    if report.issues:
+        sys.exit(1)
+
+
 cli_parser = ArgumentParser(usage="Utility tools for versioning application. Versions follow semantic versioning.")
 subparsers = cli_parser.add_subparsers()
 
@@ -27,7 +137,7 @@ add_version_parser = subparsers.add_parser("add", usage="Adds the version provid
 add_version_parser.add_argument(
     "version", help="The version to add to the package.", type=Version.parse,
 )
-add_version_parser.set_defaults(func=lambda r, a: add_version_to_project(a.version))
+add_version_parser.set_defaults(func=lambda r, a: _version.add_version_to_project(a.version))
 
 infer_version_parser = subparsers.add_parser("get", usage="Get the current version of the package.")
 infer_version_parser.add_argument(
@@ -38,9 +148,60 @@ infer_version_parser.add_argument(
 infer_version_parser.add_argument(
     "--include-alpha", help="Include alpha releases", action="store_true",
 )
+infer_version_parser.add_argument(
+    "--stream", help="Streams the tags instead of loading them in memory.", action="store_true", default=None,
+)
 infer_version_parser.set_defaults(
-    func=lambda r, a: print_version(get_version(r, infer=a.infer, include_alpha=a.include_alpha))
+    func=lambda r, a: print_version(
+        _version.get_version(r, infer=a.infer, include_alpha=a.include_alpha, stream=a.stream)
+    )
+)
+
+refs_parser = subparsers.add_parser(
+    "refs",
+    usage="Resolves the current, latest and next continuous deployment versions of a commit from a listing of refs "
+    "(git ls-remote or git show-ref -d), without a repository. Prints a JSON record.",
+)
+refs_parser.add_argument(
+    "listing", help="The file of the listing, stdin by default.", type=FileType("r"), nargs="?", default="-",
 )
+refs_parser.add_argument("--branch", help="The branch of the commit.", default=None)
+refs_parser.add_argument(
+    "--commit",
+    help="The sha of the commit. Defaults to the head of the branch, else to HEAD. Required for listings of tags only "
+    "(git ls-remote --tags), which list neither HEAD nor branches.",
+    default=None,
+)
+refs_parser.set_defaults(func=lambda r, a: print_listed_versions(a.listing, a.branch, a.commit), without_repo=True)
+
+build_parser = subparsers.add_parser(
+    "build", usage="Builds the package with the version provided, without rewriting any file of the project."
+)
+build_parser.add_argument(
+    "version", help="The version of the package.", type=Version.parse,
+)
+build_parser.add_argument(
+    "--format", help="The format of the artifacts to build.", choices=BUILD_FORMATS, action="append", default=None,
+)
+build_parser.add_argument(
+    "--dist-dir", help="The directory of the artifacts.", type=Path, default=PROJECT_DIR / "dist",
+)
+build_parser.set_defaults(
+    func=lambda r, a: _version.build_package(a.version, a.dist_dir, formats=a.format or BUILD_FORMATS)
+)
+
+zipapp_parser = subparsers.add_parser(
+    "zipapp", usage="Packages the tool and its runtime dependencies into a single zipapp with precompiled bytecode."
+)
+zipapp_parser.add_argument("--output", help="The path of the zipapp.", type=Path, default=ZIPAPP_PATH)
+zipapp_parser.add_argument(
+    "--interpreter", help="The interpreter of the shebang line of the zipapp.", default="/usr/bin/env python3",
+)
+zipapp_parser.add_argument("--compress", help="Compress the zipapp, imports are slower.", action="store_true")
+zipapp_parser.add_argument(
+    "--runs", help="The number of runs of: get measuring the cold start of the zipapp, 0 to skip.", type=int, default=5,
+)
+zipapp_parser.set_defaults(func=lambda r, a: build_version_zipapp(a.output, a.interpreter, a.compress, a.runs))
 
 tag_version_parser = subparsers.add_parser("tag", usage="Tags the current commit with the version provided.")
 tag_version_parser.add_argument(
@@ -52,10 +213,135 @@ tag_version_parser.add_argument(
     action="store_true",
 )
 tag_version_parser.add_argument("--push", help="Push the tag to the remote repository.", action="store_true")
-tag_version_parser.set_defaults(func=lambda r, a: tag_version(r, a.version, push_tag=a.push, force_tag=a.force))
+tag_version_parser.set_defaults(
+    func=lambda r, a: _version.tag_version(r, a.version, push_tag=a.push, force_tag=a.force)
+)
+
+preview_version_parser = subparsers.add_parser(
+    "preview", usage="Prints the version each branch would get if it was built now, one JSON record per line."
+)
+preview_version_parser.add_argument(
+    "--include-alpha", help="Include alpha releases", action="store_true",
+)
+preview_version_parser.add_argument(
+    "--include-remotes", help="Include remote-tracking branches", action="store_true",
+)
+preview_version_parser.set_defaults(
+    func=lambda r, a: print_branch_versions(
+        _version.preview_versions(r, include_alpha=a.include_alpha, include_remotes=a.include_remotes)
+    )
+)
 
+watch_version_parser = subparsers.add_parser(
+    "watch", usage="Writes the current version of the package every time the refs of the repository change."
+)
+watch_version_parser.add_argument(
+    "--infer",
+    help="Infers the version of the package if the current package is not versioned explicitly.",
+    action="store_true",
+)
+watch_version_parser.add_argument(
+    "--include-alpha", help="Include alpha releases", action="store_true",
+)
+watch_version_parser.add_argument(
+    "--output", help="Writes the version to this file instead of stdout.", type=optional(Path), default=None,
+)
+watch_version_parser.add_argument(
+    "--poll-interval",
+    help="Interval in seconds between checks of the refs if inotify is not available.",
+    type=float,
+    default=1.0,
+)
+watch_version_parser.set_defaults(
+    func=lambda r, a: _version.watch_version(
+        r, infer=a.infer, include_alpha=a.include_alpha, output_path=a.output, poll_interval=a.poll_interval
+    )
+)
 
-if __name__ == "__main__":
-    repo = Repo(PROJECT_DIR)
+publish_parser = subparsers.add_parser(
+    "publish", usage="Uploads the wheels and source distributions of the package concurrently to a package index."
+)
+publish_parser.add_argument(
+    "--dist-dir", help="The directory containing the artifacts.", type=Path, default=PROJECT_DIR / "dist",
+)
+publish_parser.add_argument(
+    "--repository-url",
+    help="The upload url of the package index. Defaults to the REPOSITORY_URL environment variable or PyPI.",
+    default=os.environ.get("REPOSITORY_URL") or PUBLISH_REPOSITORY_URL,
+)
+publish_parser.add_argument(
+    "--simple-index-url",
+    help="The simple index url of the package index, used to skip artifacts it already has.",
+    default=os.environ.get("REPOSITORY_SIMPLE_INDEX_URL"),
+)
+publish_parser.add_argument("--max-workers", help="The number of concurrent uploads.", type=int, default=4)
+publish_parser.add_argument("--retries", help="The number of retries of a failed upload.", type=int, default=3)
+publish_parser.add_argument("--dry-run", help="Do not upload the artifacts.", action="store_true")
+publish_parser.set_defaults(
+    func=lambda r, a: print_upload_results(
+        _version.publish_artifacts(
+            _version.get_artifacts(a.dist_dir),
+            repository_url=a.repository_url,
+            username=os.environ.get("REPOSITORY_USERNAME"),
+            password=os.environ.get("REPOSITORY_PASSWORD"),
+            simple_index_url=a.simple_index_url,
+            max_workers=a.max_workers,
+            retries=a.retries,
+            dry_run=a.dry_run,
+        )
+    )
+)
+
+sync_registry_parser = subparsers.add_parser(
+    "sync", usage="Imports the version tags of the repository into a version registry. Only new versions are written."
+)
+sync_registry_parser.add_argument(
+    "--registry",
+    help="The path of the SQLite version registry, created if it does not exist.",
+    type=Path,
+    default=VERSION_REGISTRY_PATH,
+    required=VERSION_REGISTRY_PATH is None,
+)
+sync_registry_parser.add_argument(
+    "--package", help="The package the versions belong to. Defaults to the name of the project.", default=None,
+)
+sync_registry_parser.set_defaults(func=lambda r, a: sync_version_registry(r, a.registry, a.package))
+
+audit_parser = subparsers.add_parser(
+    "audit",
+    usage="Reports the tags which look like versions but are rejected, versions tagged on several commits and alpha "
+    "versions of another commit. Exits with 1 if there is any.",
+)
+audit_parser.add_argument(
+    "--max-workers", help="The number of processes classifying tags. Defaults to the number of CPUs.", type=int,
+)
+audit_parser.add_argument(
+    "--chunk-size", help="The number of tags classified at once by a process.", type=int, default=AUDIT_CHUNK_SIZE,
+)
+audit_parser.set_defaults(
+    func=lambda r, a: print_audit_report(_version.audit_tags(r, max_workers=a.max_workers, chunk_size=a.chunk_size))
+)
+
+record_parser = subparsers.add_parser(
+    "record", usage="Records what resolving the version of the current commit reads, as JSON, to replay it without git."
+)
+record_parser.add_argument(
+    "--output", help="Writes the record to this file instead of stdout.", type=optional(Path), default=None,
+)
+record_parser.set_defaults(func=lambda r, a: print_record(_version.record_resolution(r), a.output))
+
+replay_parser = subparsers.add_parser(
+    "replay", usage="Resolves recorded versions again without git and checks the outcome matches the recorded one."
+)
+replay_parser.add_argument("records", help="The files of the records to replay.", type=Path, nargs="+")
+replay_parser.set_defaults(func=lambda r, a: print_replays(a.records))
+
+
+def main() -> None:
     args = cli_parser.parse_args()
+    repo = None if getattr(args, "without_repo", False) else Repo(PROJECT_DIR)
     args.func(repo, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,19 @@
-from ._commands import *
+from typing import Any, TYPE_CHECKING
+
 from ._config import *
+from ._config import __all__ as _config_all
+from ._commands import EXPORTS as _COMMAND_EXPORTS
+
+if TYPE_CHECKING:
+    from ._commands import *
+
+__all__ = [*_COMMAND_EXPORTS, *_config_all]
+
+
+def __getattr__(name: str) -> Any:
+    # the commands are imported on first access, see _commands
+    if name not in _COMMAND_EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from . import _commands
+
+    return getattr(_commands, name)
@@ -1,3 +1,67 @@
-from ._add import *
-from ._get import *
-from ._tag import *
+"""
+The commands are imported on first access so that running a command only imports the modules it uses.
+"""
+from importlib import import_module
+from typing import Any, Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ._add import *
+    from ._get import *
+    from ._tag import *
+    from ._preview import *
+    from ._watch import *
+    from ._session import *
+    from ._publish import *
+    from ._registry import *
+    from ._replay import *
+    from ._build import *
+    from ._zipapp import *
+    from ._listing import *
+    from ._audit import *
+
+# maps each name exported by the commands to the module defining it, kept in sync with the __all__ of the modules
+EXPORTS: Dict[str, str] = {
+    "add_version_to_project": "._add",
+    "get_project_name": "._add",
+    "get_repo_branching_model": "._get",
+    "get_resolver_class": "._get",
+    "get_resolver_from_snapshot": "._get",
+    "get_version": "._get",
+    "tag_version": "._tag",
+    "BranchVersion": "._preview",
+    "preview_versions": "._preview",
+    "iter_versions": "._watch",
+    "watch_version": "._watch",
+    "VersionSession": "._session",
+    "get_artifacts": "._publish",
+    "publish_artifacts": "._publish",
+    "UploadResult": "._publish",
+    "UploadStatus": "._publish",
+    "sync_registry": "._registry",
+    "VersionRecord": "._registry",
+    "VersionRegistry": "._registry",
+    "record_resolution": "._replay",
+    "replay_resolution": "._replay",
+    "ReplayRepo": "._replay",
+    "ResolutionRecord": "._replay",
+    "build_package": "._build",
+    "build_zipapp": "._zipapp",
+    "ColdStart": "._zipapp",
+    "measure_cold_start": "._zipapp",
+    "get_listed_versions": "._listing",
+    "ListedVersions": "._listing",
+    "audit_tags": "._audit",
+    "TagAudit": "._audit",
+    "TagAuditReport": "._audit",
+    "TagIssue": "._audit",
+}
+
+__all__ = list(EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
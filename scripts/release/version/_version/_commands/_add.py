@@ -8,11 +8,11 @@ from poetry.core.semver import Version
 from .._config import PROJECT_DIR, VERSION_FILE_NAME
 from .._stages import VERSION_PATTERN
 
-__all__ = ["add_version_to_project"]
+__all__ = ["add_version_to_project", "get_project_name"]
 
 logger = getLogger(__file__)
 
-TOML_FILE_PATH = PROJECT_DIR / "pyproject.toml"
+TOML_FILE_NAME = "pyproject.toml"
 
 VERSION_PATTERN_STRING = VERSION_PATTERN.pattern.lstrip("^").rstrip("$")
 VERSION_PATTERN_STRING_FORMAT = '__version__ = "{pattern}"'
@@ -21,29 +21,41 @@ VERSION_PATTERN = re.compile(
 )
 
 
-def add_version_to_project(version: Version) -> None:
+def add_version_to_project(version: Version, *, project_dir: Path = PROJECT_DIR) -> None:
     """
-    Adds the version provided to the pyproject.toml file and the version file.
+    Adds the version provided to the pyproject.toml file and the version file of the project.
     """
     # update pyproject.toml
     logger.debug("Adding version: %s to pyproject.toml file", version.text)
-    toml_file = TOMLFile(TOML_FILE_PATH)
+    toml_file = TOMLFile(project_dir / TOML_FILE_NAME)
     content = toml_file.read()
     poetry_content = content["tool"]["poetry"]
     poetry_content["version"] = version.text
     toml_file.write(content)
 
     # update version file
-    package_name = str(poetry_content["name"])
-    version_file_path = PROJECT_DIR / package_name.replace("-", "_") / VERSION_FILE_NAME
+    version_file_path = _get_version_file_path(project_dir, str(poetry_content["name"]))
     logger.debug("Adding version: %s to %s file", version.text, VERSION_FILE_NAME)
     _add_version_to_package_version_file(version_file_path, version)
 
 
+def get_project_name(project_dir: Path = PROJECT_DIR) -> str:
+    """
+    Returns the name of the project declared in its pyproject.toml file.
+    """
+    return str(TOMLFile(project_dir / TOML_FILE_NAME).read()["tool"]["poetry"]["name"])
+
+
+def _get_version_file_path(project_dir: Path, package_name: str) -> Path:
+    return project_dir / package_name.replace("-", "_") / VERSION_FILE_NAME
+
+
 def _add_version_to_package_version_file(version_file_path: Path, version: Version) -> None:
-    version_file_content = version_file_path.read_text()
-    content_replaced = VERSION_PATTERN.sub(
+    version_file_path.write_text(_add_version_to_version_file_content(version_file_path.read_text(), version))
+
+
+def _add_version_to_version_file_content(content: str, version: Version) -> str:
+    return VERSION_PATTERN.sub(
         lambda m: f"{m.groups()[0]}{VERSION_PATTERN_STRING_FORMAT.format(pattern=version.text)}{m.groups()[-1]}",
-        version_file_content
+        content
     )
-    version_file_path.write_text(content_replaced)
@@ -0,0 +1,247 @@
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from enum import Enum
+from itertools import chain, islice
+from logging import getLogger
+import os
+import re
+import subprocess
+from typing import Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from git import Repo
+from poetry.core.semver import Version
+
+from .._config import AUDIT_CHUNK_SIZE, VERSION_TAG_STRING_FORMAT
+from .._stages import get_stage, Stage
+from .._tags import from_tag, to_tag
+
+__all__ = ["audit_tags", "TagAudit", "TagAuditReport", "TagIssue"]
+
+logger = getLogger(__name__)
+
+_TAG_LISTING_FORMAT = "%(refname:strip=2) %(objectname) %(*objectname)"
+_TAG_PREFIX = VERSION_TAG_STRING_FORMAT.split("{version}")[0]
+# tags looking like versions, with or without the prefix of version tags: v1.2.3, v1.2.3rc1, v10.2.3, 1.2 ...
+NEAR_MISS_PATTERN = re.compile(rf"^({re.escape(_TAG_PREFIX)})?\d+\.\d+")
+
+
+class TagIssue(Enum):
+    REJECTED = "rejected"
+    DUPLICATE = "duplicate"
+    CONFLICT = "conflict"
+    MISSING_COMMIT = "missing-commit"
+    WRONG_COMMIT = "wrong-commit"
+
+
+class TagAudit(NamedTuple):
+    tag: str
+    commit_sha: str
+    issue: TagIssue
+    detail: str
+
+
+class TagAuditReport(NamedTuple):
+    n_tags: int
+    n_version_tags: int
+    issues: List[TagAudit]
+
+
+class _AuditedTag(NamedTuple):
+    name: str
+    commit_sha: str
+    # the text of the canonical version of the tag: tags with the same key are tags of the same version
+    version_key: Optional[str]
+    rejection: Optional[str]
+    # the commit hash of an alpha version which is not the prefix of the commit of the tag
+    alpha_hash: Optional[str]
+
+
+def audit_tags(
+    repo: Repo, *, max_workers: Optional[int] = None, chunk_size: int = AUDIT_CHUNK_SIZE
+) -> TagAuditReport:
+    """
+    Streams the tags of the repository once and reports the tags which change version resolution silently:
+    - tags looking like versions that the version tag pattern rejects, f.ex. v0.1.0rc1 or v0.10.0: they are ignored
+    - versions tagged more than once on the same commit (duplicates) or on different commits (conflicts)
+    - alpha versions whose commit hash is not the commit they are tagged on: it is missing from the repository or it
+      is another commit
+    Tags are classified in chunks, in a process pool when there is more than one chunk and more than one worker: the
+    number of CPUs unless max_workers is provided. On a single CPU the pool is slower than classifying in process.
+    """
+    process = repo.git.for_each_ref("refs/tags", format=_TAG_LISTING_FORMAT, as_process=True)
+    chunks = _get_chunks((line.decode() for line in process.stdout), chunk_size)
+    first_chunks = list(islice(chunks, 2))
+    n_workers = max_workers or os.cpu_count() or 1
+    audit = _TagAuditCollector()
+    if len(first_chunks) < 2 or n_workers < 2:
+        for chunk in chain(first_chunks, chunks):
+            audit.add(*_audit_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            for n_chunk_tags, chunk_tags in _map_in_window(executor, chain(first_chunks, chunks), 2 * n_workers):
+                audit.add(n_chunk_tags, chunk_tags)
+    process.wait()
+
+    issues = audit.get_issues(repo)
+    logger.info("Audited %d tag(s), %d version tag(s): %d issue(s)", audit.n_tags, audit.n_version_tags, len(issues))
+    return TagAuditReport(audit.n_tags, audit.n_version_tags, issues)
+
+
+class _TagAuditCollector:
+    """
+    Folds the classified chunks as they arrive: only the first tag of each version and the tags of issues are kept.
+    """
+
+    def __init__(self) -> None:
+        self.n_tags = 0
+        self.n_version_tags = 0
+        self._rejected_tags: List[_AuditedTag] = []
+        self._first_tags: Dict[str, _AuditedTag] = {}
+        # the tags of versions tagged more than once, including the first one
+        self._repeated_tags: Dict[str, List[_AuditedTag]] = {}
+        self._alpha_tags: List[_AuditedTag] = []
+
+    def add(self, n_tags: int, audited_tags: Iterable[_AuditedTag]) -> None:
+        self.n_tags += n_tags
+        for tag in audited_tags:
+            if tag.rejection:
+                self._rejected_tags.append(tag)
+            else:
+                self.n_version_tags += 1
+            if tag.version_key:
+                first_tag = self._first_tags.setdefault(tag.version_key, tag)
+                if first_tag is not tag:
+                    self._repeated_tags.setdefault(tag.version_key, [first_tag]).append(tag)
+            if tag.alpha_hash:
+                self._alpha_tags.append(tag)
+
+    def get_issues(self, repo: Repo) -> List[TagAudit]:
+        issues = [
+            TagAudit(tag.name, tag.commit_sha, TagIssue.REJECTED, str(tag.rejection)) for tag in self._rejected_tags
+        ]
+
+        for version_key, tags in self._repeated_tags.items():
+            issue = TagIssue.DUPLICATE if len({tag.commit_sha for tag in tags}) == 1 else TagIssue.CONFLICT
+            for tag in tags:
+                other_tags = ", ".join(sorted(f"{t.name} ({t.commit_sha})" for t in tags if t is not tag))
+                detail = f"the version: {version_key} is also tagged as: {other_tags}"
+                issues.append(TagAudit(tag.name, tag.commit_sha, issue, detail))
+
+        alpha_commits = _get_commit_shas(repo, [str(tag.alpha_hash) for tag in self._alpha_tags])
+        for tag in self._alpha_tags:
+            alpha_commit_sha = alpha_commits.get(str(tag.alpha_hash))
+            if alpha_commit_sha is None:
+                issue, detail = TagIssue.MISSING_COMMIT, f"the commit: {tag.alpha_hash} of the version is missing"
+            else:
+                issue, detail = TagIssue.WRONG_COMMIT, f"the version is the version of the commit: {alpha_commit_sha}"
+            issues.append(TagAudit(tag.name, tag.commit_sha, issue, detail))
+        return issues
+
+
+def _map_in_window(
+    executor: Executor, chunks: Iterable[List[str]], window: int
+) -> Iterator[Tuple[int, List[_AuditedTag]]]:
+    """
+    Classifies the chunks in the executor in order, with at most window chunks submitted and not yet collected, so that
+    the listing is not read ahead of the workers.
+    """
+    pending: Deque["Future[Tuple[int, List[_AuditedTag]]]"] = deque()
+    for chunk in chunks:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(_audit_chunk, chunk))
+    while pending:
+        yield pending.popleft().result()
+
+
+def _get_chunks(lines: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    iterator = iter(lines)
+    chunk = list(islice(iterator, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, chunk_size))
+
+
+def _audit_chunk(lines: Sequence[str]) -> Tuple[int, List[_AuditedTag]]:
+    """
+    Classifies a chunk of the tag listing. Only tags of versions and tags looking like versions are returned, with
+    their number of tags.
+    """
+    audited_tags = []
+    for line in lines:
+        name, object_sha, *peeled_sha = line.split()
+        commit_sha = peeled_sha[0] if peeled_sha else object_sha
+        version = from_tag(name)
+        if version:
+            alpha_hash = None
+            if get_stage(version) is Stage.ALPHA and "+" in version.text:
+                # the hash is read from the text: a hash made of digits is parsed as a number
+                alpha_hash = version.text.rsplit("+", 1)[1]
+                alpha_hash = None if commit_sha.startswith(alpha_hash) else alpha_hash
+            audited_tags.append(_AuditedTag(name, commit_sha, version.text, None, alpha_hash))
+        elif NEAR_MISS_PATTERN.match(name):
+            version_key, rejection = _get_rejection(name)
+            audited_tags.append(_AuditedTag(name, commit_sha, version_key, rejection, None))
+    return len(lines), audited_tags
+
+
+def _get_rejection(name: str) -> Tuple[Optional[str], str]:
+    """
+    Returns the text of the canonical version of a tag the version tag pattern rejects, if it is a version, and why it
+    is rejected.
+    """
+    try:
+        version = Version.parse(name[len(_TAG_PREFIX):] if name.startswith(_TAG_PREFIX) else name)
+    except ValueError:
+        return None, "the tag is not a valid version"
+
+    numbers = [version.major, version.minor, version.patch]
+    numbers.extend(part for part in (*version.prerelease, *version.build) if isinstance(part, int))
+    canonical_version = _get_canonical_version(version)
+    version_key = canonical_version.text if canonical_version else version.text
+    if any(number >= 10 for number in numbers):
+        return version_key, "the version has multi-digit components, which the version tag pattern does not support"
+    canonical_tag = to_tag(canonical_version)
+    if canonical_tag and from_tag(canonical_tag):
+        return version_key, f"the tag is not in the canonical form: {canonical_tag}"
+    return version_key, "the tag is not a valid version tag"
+
+
+def _get_canonical_version(version: Version) -> Optional[Version]:
+    try:
+        stage = get_stage(version)
+    except NotImplementedError:
+        return None
+    numbers = [part for part in (*version.prerelease, *version.build) if isinstance(part, int)]
+    if stage is Stage.RELEASE:
+        canonical_version: Optional[Version] = Version(version.major, version.minor, version.patch)
+    elif stage is Stage.RELEASE_CANDIDATE and numbers:
+        canonical_version = Version(version.major, version.minor, version.patch, pre=f"{stage.value}{numbers[0]}")
+    elif stage is Stage.POST and numbers:
+        canonical_version = Version(version.major, version.minor, version.patch, build=f"{stage.value}{numbers[0]}")
+    else:
+        canonical_version = None
+    # f.ex. 1.2.3.4 is not the release 1.2.3
+    return canonical_version if canonical_version == version else None
+
+
+def _get_commit_shas(repo: Repo, commit_hashes: Sequence[str]) -> Dict[str, str]:
+    """
+    Maps the abbreviated hashes provided which name commits of the repository to their sha, in one git call.
+    """
+    if not commit_hashes:
+        return {}
+    listing = subprocess.run(
+        [repo.git.GIT_PYTHON_GIT_EXECUTABLE or "git", "cat-file", "--batch-check"],
+        cwd=repo.git_dir,
+        input="\n".join(commit_hashes) + "\n",
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stdout
+    commit_shas = {}
+    for commit_hash, line in zip(commit_hashes, listing.splitlines()):
+        object_sha, object_type, *_ = line.split()
+        if object_type == "commit":
+            commit_shas[commit_hash] = object_sha
+    return commit_shas
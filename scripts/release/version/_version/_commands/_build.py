@@ -0,0 +1,93 @@
+from gzip import GzipFile
+from io import BytesIO
+from logging import getLogger
+import os
+from pathlib import Path
+import tarfile
+from typing import List, Mapping, Sequence, Tuple
+
+from poetry.core.semver import Version
+from poetry.core.toml import TOMLFile
+
+from .._config import BUILD_FORMATS, PROJECT_DIR
+from ._add import _add_version_to_version_file_content, _get_version_file_path, TOML_FILE_NAME
+
+__all__ = ["build_package"]
+
+logger = getLogger(__name__)
+
+# the build system of source distributions: their version is stamped so they are built without resolving it again
+SDIST_BUILD_SYSTEM = {"requires": ["poetry-core>=1.0.0"], "build-backend": "poetry.core.masonry.api"}
+
+
+def build_package(
+    version: Version, dist_dir: Path, *, project_dir: Path = PROJECT_DIR, formats: Sequence[str] = ("wheel",)
+) -> List[Path]:
+    """
+    Builds the project with the version provided and returns the paths of the artifacts built. The version is injected
+    in memory into the metadata, the version file and the pyproject.toml file shipped in the artifacts: no file of the
+    project is rewritten.
+    """
+    # the builders of poetry-core import setuptools: they are only imported when building so that the other commands
+    # start quickly
+    from poetry.core.factory import Factory
+    from poetry.core.masonry.builders.sdist import SdistBuilder
+    from ._wheel import StampedWheelBuilder
+
+    poetry = Factory().create_poetry(project_dir)
+    # poetry-core packages have no version setter: the version read from pyproject.toml is replaced in memory
+    poetry.package._version = version
+    poetry.package._pretty_version = version.text
+    poetry.local_config["version"] = version.text
+
+    project_dir = Path(poetry.file.parent).resolve()
+    version_file_path = _get_version_file_path(project_dir, poetry.package.name)
+    stamped_files = {
+        version_file_path.resolve(): _add_version_to_version_file_content(version_file_path.read_text(), version)
+    }
+
+    artifacts = []
+    for build_format in formats:
+        if build_format == "wheel":
+            builder = StampedWheelBuilder(poetry, stamped_files, target_dir=dist_dir)
+            builder.build()
+            artifacts.append(dist_dir / builder.wheel_filename)
+        elif build_format == "sdist":
+            artifact = SdistBuilder(poetry).build(dist_dir)
+            pyproject = TOMLFile(project_dir / TOML_FILE_NAME).read()
+            pyproject["tool"]["poetry"]["version"] = version.text
+            pyproject["build-system"] = SDIST_BUILD_SYSTEM
+            members = {
+                file_path.relative_to(project_dir).as_posix(): content
+                for file_path, content in stamped_files.items()
+            }
+            members[TOML_FILE_NAME] = pyproject.as_string()
+            _stamp_sdist(artifact, members)
+            artifacts.append(artifact)
+        else:
+            raise ValueError(f"Unknown build format: {build_format}. Valid formats are: {BUILD_FORMATS}.")
+        logger.info("Built %s with version: %s", artifacts[-1].name, version.text)
+    return artifacts
+
+
+def _stamp_sdist(path: Path, members: Mapping[str, str]) -> None:
+    """
+    Replaces the content of the members of the source distribution provided, named relatively to its root directory.
+    """
+    with tarfile.open(path, mode="r:gz") as sdist:
+        contents: List[Tuple[tarfile.TarInfo, bytes]] = []
+        for member in sdist.getmembers():
+            file = sdist.extractfile(member) if member.isreg() else None
+            contents.append((member, file.read() if file else b""))
+
+    temporary_path = path.with_name(f".{path.name}")
+    with GzipFile(temporary_path, mode="wb", mtime=0) as gz, tarfile.TarFile(
+        mode="w", fileobj=gz, format=tarfile.PAX_FORMAT
+    ) as sdist:
+        for member, content in contents:
+            relative_name = member.name.split("/", 1)[-1]
+            if relative_name in members:
+                content = members[relative_name].encode()
+                member.size = len(content)
+            sdist.addfile(member, BytesIO(content) if member.isreg() else None)
+    os.replace(temporary_path, path)
@@ -1,27 +1,125 @@
-from typing import Optional
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Optional, Type, Union
 
 from git import Repo
 from poetry.core.semver import Version
 
-from .._config import CONTINUOUS_DEPLOYMENT
-from .._providers import IVersionProvider, VersionProviderFromTags, VersionProviderFromTagsVisibleFromCommit
-from .._resolvers import IVersionResolver, GitFlowReleaseVersionResolver, ContinuousDeploymentVersionResolver
+from .._config import CONTINUOUS_DEPLOYMENT, PROJECT_DIR, STREAM_VERSION_TAGS, VERSION_REGISTRY_PATH
+from .._providers import (
+    IVersionProvider,
+    VersionProviderFromRegistry,
+    VersionProviderFromSnapshot,
+    VersionProviderFromTags,
+    VersionProviderFromTagStream,
+    VersionProviderFromTagsVisibleFromCommit,
+)
+from .._resolvers import (
+    BranchBasedVersionResolver,
+    IVersionResolver,
+    GitFlowReleaseVersionResolver,
+    ContinuousDeploymentVersionResolver,
+    NOT_PROVIDED,
+    NotProvided,
+)
+from .._model import BranchingModel, get_branching_model
+from .._registry import VersionRegistry
+from .._snapshot import RefSnapshot
 from .._stages import get_stage, Stage
+from ._add import get_project_name, TOML_FILE_NAME
 
-__all__ = ["get_version"]
+__all__ = ["get_repo_branching_model", "get_resolver_class", "get_resolver_from_snapshot", "get_version"]
 
 
-def get_version(repo: Repo, *, infer: bool = False, include_alpha: bool = False) -> Optional[Version]:
+def get_version(
+    repo: Repo, *, infer: bool = False, include_alpha: bool = False, stream: Optional[bool] = None
+) -> Optional[Version]:
+    """
+    Returns the version of the head of the repository. Versions are read from the version registry if one is configured,
+    else from the tags of the repository: streamed in constant memory if stream is set or, if it is not provided, if it
+    is configured.
+    """
+    resolver_class = get_resolver_class(repo)
+    is_git_flow = issubclass(resolver_class, GitFlowReleaseVersionResolver)
+    with ExitStack() as stack:
+        if VERSION_REGISTRY_PATH is not None:
+            registry = stack.enter_context(VersionRegistry(VERSION_REGISTRY_PATH))
+            project_name = get_project_name(_get_project_dir(repo))
+            provider: IVersionProvider = VersionProviderFromRegistry(
+                registry, project_name, repo.head.commit.hexsha, repo=repo if is_git_flow else None
+            )
+        elif STREAM_VERSION_TAGS if stream is None else stream:
+            provider = VersionProviderFromTagStream(repo, visible=is_git_flow)
+        elif is_git_flow:
+            provider = VersionProviderFromTagsVisibleFromCommit(repo)
+        else:
+            provider = VersionProviderFromTags(repo)
 
-    if CONTINUOUS_DEPLOYMENT:
-        provider: IVersionProvider = VersionProviderFromTags(repo)
-        resolver: IVersionResolver = ContinuousDeploymentVersionResolver(provider, repo)
-    else:
-        provider = VersionProviderFromTagsVisibleFromCommit(repo)
-        resolver = GitFlowReleaseVersionResolver(provider, repo)
+        resolver: IVersionResolver = resolver_class(provider, repo)
+        version = resolver.resolve_version() if infer else provider.get_current_version()
 
-    version = resolver.resolve_version() if infer else provider.get_current_version()
     if version and not include_alpha and get_stage(version) is Stage.ALPHA:
         return None
 
     return version
+
+
+def get_resolver_class(
+    repo: Repo,
+    *,
+    branching_model: Union[BranchingModel, None, NotProvided] = NOT_PROVIDED,
+    continuous_deployment: Optional[bool] = None,
+) -> Type[BranchBasedVersionResolver]:
+    """
+    Returns the resolver class of the branching model provided or, if none is provided, of the branching model declared
+    in the pyproject.toml file of the repository. Without a branching model, the resolver class is the one of the
+    release logic provided or of the configuration.
+    """
+    if isinstance(branching_model, NotProvided):
+        branching_model = get_repo_branching_model(repo)
+    if branching_model is not None:
+        return branching_model.resolver_class
+    if CONTINUOUS_DEPLOYMENT if continuous_deployment is None else continuous_deployment:
+        return ContinuousDeploymentVersionResolver
+    return GitFlowReleaseVersionResolver
+
+
+def get_repo_branching_model(repo: Repo) -> Optional[BranchingModel]:
+    """
+    Returns the branching model declared in the pyproject.toml file of the working tree of the repository if any.
+    """
+    return get_branching_model(_get_project_dir(repo) / TOML_FILE_NAME)
+
+
+def get_resolver_from_snapshot(
+    repo: Repo,
+    snapshot: RefSnapshot,
+    branch: str,
+    commit_sha: str,
+    *,
+    release_candidate_version: Union[Version, None, NotProvided] = NOT_PROVIDED,
+    branching_model: Union[BranchingModel, None, NotProvided] = NOT_PROVIDED,
+    continuous_deployment: Optional[bool] = None,
+) -> BranchBasedVersionResolver:
+    """
+    Returns the resolver get_version would use for the branch and commit provided, reading versions from the snapshot
+    instead of the repository. The latest release candidate version is derived from the branches of the snapshot
+    unless it is provided. The resolver class is chosen by get_resolver_class.
+    """
+    resolver_class = get_resolver_class(
+        repo, branching_model=branching_model, continuous_deployment=continuous_deployment
+    )
+    if not issubclass(resolver_class, GitFlowReleaseVersionResolver):
+        provider = VersionProviderFromSnapshot(snapshot, commit_sha)
+        return resolver_class(provider, repo, branch=branch, commit_sha=commit_sha)
+
+    if isinstance(release_candidate_version, NotProvided):
+        release_candidate_version = resolver_class.get_latest_candidate_version_from_branches(snapshot.branches)
+    provider = VersionProviderFromSnapshot(snapshot, commit_sha, visible=True)
+    return resolver_class(
+        provider, repo, branch=branch, commit_sha=commit_sha, release_candidate_version=release_candidate_version
+    )
+
+
+def _get_project_dir(repo: Repo) -> Path:
+    return Path(repo.working_tree_dir or PROJECT_DIR)
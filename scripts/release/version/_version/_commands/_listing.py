@@ -0,0 +1,49 @@
+from typing import Iterable, NamedTuple, Optional, cast
+
+from git import Repo
+from poetry.core.semver import Version
+
+from .._config import DETACHED_HEAD
+from .._providers import VersionProviderFromRefListing
+from .._resolvers import ContinuousDeploymentVersionResolver, VersionResolutionError
+
+__all__ = ["get_listed_versions", "ListedVersions"]
+
+
+class ListedVersions(NamedTuple):
+    branch: str
+    commit_sha: str
+    current_version: Optional[Version]
+    latest_version: Optional[Version]
+    next_version: Optional[Version]
+    error: Optional[str]
+
+
+def get_listed_versions(
+    lines: Iterable[str], *, branch: Optional[str] = None, commit_sha: Optional[str] = None
+) -> ListedVersions:
+    """
+    Resolves the current and latest versions of a commit from a listing of refs in the format of git ls-remote or git
+    show-ref -d, without a repository, and the next version continuous deployment would give it. The commit defaults
+    to the head of the branch provided, else to HEAD. The branch defaults to the branch of the listing the commit is the
+    head of, chosen as for a detached head. Resolution errors are reported instead of being raised.
+    Raises ProvideVersionError if the listing does not list the head of the commit: the commit is required for a
+    listing of tags only (git ls-remote --tags), which lists neither HEAD nor branches.
+    """
+    provider = VersionProviderFromRefListing(lines, commit_sha, branch=branch)
+    commit_sha = provider.commit_sha
+    resolver_class = ContinuousDeploymentVersionResolver
+    if branch is None:
+        heads = {name: head_sha for name, head_sha in provider.snapshot.branches.items() if head_sha == commit_sha}
+        branch = resolver_class.get_branch_name_of_commit(heads, commit_sha) or DETACHED_HEAD
+
+    next_version, error = None, None
+    try:
+        # the resolver is given the branch and the commit: it never reads the repository, there is none
+        resolver = resolver_class(provider, cast(Repo, None), branch=branch, commit_sha=commit_sha)
+        next_version = resolver.resolve_version()
+    except VersionResolutionError as e:
+        error = str(e)
+    return ListedVersions(
+        branch, commit_sha, provider.get_current_version(), provider.get_latest_version(), next_version, error
+    )
@@ -0,0 +1,60 @@
+from typing import List, NamedTuple, Optional
+
+from git import Repo
+from poetry.core.semver import Version
+
+from .._resolvers import GitFlowReleaseVersionResolver, VersionResolutionError
+from .._snapshot import RefSnapshot
+from .._stages import get_stage, Stage
+from ._get import get_repo_branching_model, get_resolver_class, get_resolver_from_snapshot
+
+__all__ = ["BranchVersion", "preview_versions"]
+
+
+class BranchVersion(NamedTuple):
+    branch: str
+    commit_sha: str
+    stage: Optional[Stage]
+    version: Optional[Version]
+    error: Optional[str]
+
+
+def preview_versions(
+    repo: Repo, *, include_alpha: bool = False, include_remotes: bool = False, snapshot: Optional[RefSnapshot] = None
+) -> List[BranchVersion]:
+    """
+    Resolves the version each branch of the repository would get if it was built now. Tags, branches and the
+    visibility of tags from each branch are read once in a snapshot shared by all branches. Resolution errors are
+    reported per branch instead of being raised.
+    """
+    snapshot = snapshot or RefSnapshot.from_repo(repo, include_remotes=include_remotes)
+
+    branching_model = get_repo_branching_model(repo)
+    resolver_class = get_resolver_class(repo, branching_model=branching_model)
+    release_candidate_version = (
+        resolver_class.get_latest_candidate_version_from_branches(snapshot.branches)
+        if issubclass(resolver_class, GitFlowReleaseVersionResolver)
+        else None
+    )
+    branch_versions = []
+    for branch, commit_sha in sorted(snapshot.branches.items()):
+        stage, version, error = None, None, None
+        try:
+            resolver = get_resolver_from_snapshot(
+                repo,
+                snapshot,
+                branch,
+                commit_sha,
+                release_candidate_version=release_candidate_version,
+                branching_model=branching_model,
+            )
+            stage = resolver.stage
+            version = resolver.resolve_version()
+        except VersionResolutionError as e:
+            error = str(e)
+
+        if version and not include_alpha and get_stage(version) is Stage.ALPHA:
+            version = None
+        branch_versions.append(BranchVersion(branch, commit_sha, stage, version, error))
+
+    return branch_versions
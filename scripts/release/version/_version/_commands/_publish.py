@@ -0,0 +1,232 @@
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from email.message import Message
+from email.parser import Parser
+from enum import Enum
+from hashlib import md5, sha256
+from io import BytesIO
+from logging import getLogger
+from pathlib import Path
+import re
+import tarfile
+from tarfile import TarError
+import time
+from typing import Collection, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+from uuid import uuid4
+from zipfile import BadZipFile, ZipFile
+
+from .._config import PROJECT_DIR, PUBLISH_REPOSITORY_URL
+
+__all__ = ["get_artifacts", "publish_artifacts", "UploadResult", "UploadStatus"]
+
+logger = getLogger(__name__)
+
+DIST_DIR = PROJECT_DIR / "dist"
+WHEEL_PATTERN = re.compile(r"^(?P<name>[^-]+)-(?P<version>[^-]+)(-\d[^-]*)?-(?P<python>[^-]+)-[^-]+-[^-]+\.whl$")
+SDIST_PATTERN = re.compile(r"^(?P<name>.+)-(?P<version>[^-]+)\.tar\.gz$")
+SIMPLE_INDEX_LINK_PATTERN = re.compile(r"<a\s[^>]*>\s*([^<]+?)\s*</a>", re.IGNORECASE)
+RETRIED_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+ALREADY_EXISTS_STATUS_CODE = 409
+# metadata fields whose upload field name is not the lower-cased field name with dashes replaced by underscores
+METADATA_UPLOAD_FIELDS = {"classifier": "classifiers", "project-url": "project_urls"}
+
+
+class UploadStatus(Enum):
+    UPLOADED = "uploaded"
+    SKIPPED = "skipped"
+    DRY_RUN = "dry-run"
+    FAILED = "failed"
+
+
+class UploadResult(NamedTuple):
+    path: Path
+    status: UploadStatus
+    attempts: int
+    seconds: float
+    size: int
+    error: Optional[str] = None
+
+    @property
+    def throughput(self) -> float:
+        """
+        Upload throughput in bytes per second of the successful attempt.
+        """
+        return self.size / self.seconds if self.status == UploadStatus.UPLOADED and self.seconds > 0 else 0.0
+
+
+def get_artifacts(dist_dir: Path = DIST_DIR) -> List[Path]:
+    """
+    Returns the wheels and source distributions found in the directory provided.
+    """
+    return sorted(
+        path for path in dist_dir.iterdir() if WHEEL_PATTERN.match(path.name) or SDIST_PATTERN.match(path.name)
+    )
+
+
+def publish_artifacts(
+    artifacts: Collection[Path],
+    *,
+    repository_url: str = PUBLISH_REPOSITORY_URL,
+    username: Optional[str] = None,
+    password: Optional[str] = None,
+    simple_index_url: Optional[str] = None,
+    max_workers: int = 4,
+    retries: int = 3,
+    backoff: float = 1.0,
+    timeout: float = 60.0,
+    dry_run: bool = False,
+) -> List[UploadResult]:
+    """
+    Uploads the artifacts provided concurrently to a package index implementing the legacy upload API.
+    Artifacts the index already has are skipped: they are looked up in its simple index if its url is provided, and
+    uploads rejected because the file already exists are reported as skipped as well.
+    Uploads failing because of a connection error or a transient server error are retried with an exponential backoff.
+    Failures are reported in the results instead of being raised.
+    """
+    existing_files = _get_existing_files(artifacts, simple_index_url, timeout) if simple_index_url else set()
+    headers = {}
+    if username is not None or password is not None:
+        credentials = b64encode(f"{username or ''}:{password or ''}".encode()).decode()
+        headers["Authorization"] = f"Basic {credentials}"
+
+    def publish(path: Path) -> UploadResult:
+        if path.name in existing_files:
+            logger.info("Skipping %s: it already exists in the package index.", path.name)
+            return UploadResult(path, UploadStatus.SKIPPED, 0, 0.0, path.stat().st_size)
+        if dry_run:
+            logger.info("Not uploading %s in dry-run mode.", path.name)
+            return UploadResult(path, UploadStatus.DRY_RUN, 0, 0.0, path.stat().st_size)
+        try:
+            return _upload(path, repository_url, headers, retries=retries, backoff=backoff, timeout=timeout)
+        except (ValueError, OSError, BadZipFile, TarError) as e:
+            logger.error("Upload of %s failed: %s.", path.name, e)
+            return UploadResult(path, UploadStatus.FAILED, 0, 0.0, path.stat().st_size, str(e))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(publish, artifacts))
+
+
+def _upload(
+    path: Path, repository_url: str, headers: Dict[str, str], *, retries: int, backoff: float, timeout: float
+) -> UploadResult:
+    content = path.read_bytes()
+    boundary = uuid4().hex
+    body = _encode_multipart(_get_upload_fields(path, content), path.name, content, boundary)
+    request_headers = {**headers, "Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+    error = None
+    for attempt in range(1, retries + 2):
+        start = time.perf_counter()
+        try:
+            with urlopen(Request(repository_url, data=body, headers=request_headers), timeout=timeout):
+                pass
+            seconds = time.perf_counter() - start
+            logger.info("Uploaded %s in %.2fs (attempt %d).", path.name, seconds, attempt)
+            return UploadResult(path, UploadStatus.UPLOADED, attempt, seconds, len(content))
+        except HTTPError as e:
+            if e.code == ALREADY_EXISTS_STATUS_CODE or (e.code == 400 and "already exist" in str(e.reason).lower()):
+                logger.info("Skipping %s: it already exists in the package index.", path.name)
+                return UploadResult(path, UploadStatus.SKIPPED, attempt, 0.0, len(content))
+            error = f"HTTP {e.code}: {e.reason}"
+            if e.code not in RETRIED_STATUS_CODES:
+                break
+        except (URLError, OSError) as e:
+            error = str(e)
+
+        if attempt <= retries:
+            delay = backoff * 2 ** (attempt - 1)
+            logger.warning("Upload of %s failed: %s. Retrying in %.1fs.", path.name, error, delay)
+            time.sleep(delay)
+
+    logger.error("Upload of %s failed: %s.", path.name, error)
+    return UploadResult(path, UploadStatus.FAILED, attempt, 0.0, len(content), error)
+
+
+def _get_upload_fields(path: Path, content: bytes) -> List[Tuple[str, str]]:
+    """
+    Returns the fields of the upload of an artifact: the core metadata of the artifact, read from the METADATA file of a
+    wheel or the PKG-INFO file of a source distribution, the type of the artifact and its digests.
+    """
+    wheel_match = WHEEL_PATTERN.match(path.name)
+    if wheel_match:
+        file_type, python_version = "bdist_wheel", wheel_match.group("python")
+        metadata = _read_wheel_metadata(content)
+    elif SDIST_PATTERN.match(path.name):
+        file_type, python_version = "sdist", "source"
+        metadata = _read_sdist_metadata(content)
+    else:
+        raise ValueError(f"{path.name} is neither a wheel nor a source distribution.")
+
+    fields = [(":action", "file_upload"), ("protocol_version", "1")]
+    for key, value in metadata.items():
+        field = key.lower()
+        if field == "description":
+            continue
+        fields.append((METADATA_UPLOAD_FIELDS.get(field, field.replace("-", "_")), str(value)))
+    description = metadata.get_payload() or metadata.get("Description")
+    if description:
+        fields.append(("description", str(description)))
+    fields.extend(
+        [
+            ("filetype", file_type),
+            ("pyversion", python_version),
+            ("md5_digest", md5(content).hexdigest()),
+            ("sha256_digest", sha256(content).hexdigest()),
+        ]
+    )
+    return fields
+
+
+def _read_wheel_metadata(content: bytes) -> Message:
+    with ZipFile(BytesIO(content)) as wheel:
+        metadata_name = next(
+            (name for name in wheel.namelist() if re.match(r"^[^/]+\.dist-info/METADATA$", name)), None
+        )
+        if metadata_name is None:
+            raise ValueError("The wheel has no METADATA file.")
+        return Parser().parsestr(wheel.read(metadata_name).decode())
+
+
+def _read_sdist_metadata(content: bytes) -> Message:
+    with tarfile.open(fileobj=BytesIO(content), mode="r:gz") as sdist:
+        member = next((member for member in sdist.getmembers() if re.match(r"^[^/]+/PKG-INFO$", member.name)), None)
+        file = sdist.extractfile(member) if member else None
+        if file is None:
+            raise ValueError("The source distribution has no PKG-INFO file.")
+        return Parser().parsestr(file.read().decode())
+
+
+def _encode_multipart(fields: Iterable[Tuple[str, str]], file_name: str, content: bytes, boundary: str) -> bytes:
+    parts = []
+    for name, value in fields:
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="content"; filename="{file_name}"\r\n'
+        f"Content-Type: application/octet-stream\r\n\r\n".encode()
+    )
+    parts.append(content)
+    parts.append(f"\r\n--{boundary}--\r\n".encode())
+    return b"".join(parts)
+
+
+def _get_existing_files(artifacts: Iterable[Path], simple_index_url: str, timeout: float) -> Set[str]:
+    project_names = set()
+    for path in artifacts:
+        match = WHEEL_PATTERN.match(path.name) or SDIST_PATTERN.match(path.name)
+        if match:
+            project_names.add(re.sub(r"[-_.]+", "-", match.group("name")).lower())
+
+    existing_files: Set[str] = set()
+    for project_name in project_names:
+        url = f"{simple_index_url.rstrip('/')}/{project_name}/"
+        try:
+            with urlopen(url, timeout=timeout) as response:
+                existing_files.update(SIMPLE_INDEX_LINK_PATTERN.findall(response.read().decode()))
+        except HTTPError as e:
+            if e.code != 404:
+                logger.warning("Could not list the files of %s in the package index: %s.", project_name, e)
+        except URLError as e:
+            logger.warning("Could not list the files of %s in the package index: %s.", project_name, e)
+    return existing_files
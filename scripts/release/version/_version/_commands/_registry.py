@@ -0,0 +1,33 @@
+from logging import getLogger
+
+from git import Repo
+
+from .._registry import VersionRecord, VersionRegistry
+from .._tags import from_tag
+
+__all__ = ["sync_registry", "VersionRecord", "VersionRegistry"]
+
+logger = getLogger(__name__)
+
+_TAG_LISTING_FORMAT = "%(refname:strip=2) %(creatordate:unix) %(objectname) %(*objectname)"
+
+
+def sync_registry(repo: Repo, registry: VersionRegistry, package: str) -> int:
+    """
+    Imports the version tags of the repository into the registry for the package provided. Only versions the registry
+    does not have yet, or has on another commit, are written. Returns the number of versions written.
+    """
+    registered_commits = registry.get_commits(package)
+    records = []
+    for line in repo.git.for_each_ref("refs/tags", format=_TAG_LISTING_FORMAT).splitlines():
+        name, timestamp, object_sha, *peeled_sha = line.split()
+        version = from_tag(name)
+        if version is None:
+            continue
+        commit_sha = peeled_sha[0] if peeled_sha else object_sha
+        if registered_commits.get(version.text) != commit_sha:
+            records.append(VersionRecord(package, version, commit_sha, int(timestamp)))
+
+    registry.add_records(records)
+    logger.info("Imported %d version(s) of %s into the registry: %s", len(records), package, registry.path)
+    return len(records)
@@ -0,0 +1,124 @@
+import json
+from types import SimpleNamespace
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, cast
+
+from git import Repo
+from poetry.core.semver import Version
+
+from .._config import CONTINUOUS_DEPLOYMENT, DETACHED_HEAD
+from .._model import BranchingModel
+from .._resolvers import VersionResolutionError
+from .._snapshot import HeadRefSnapshot, RefSnapshot, VersionTag
+from .._tags import from_tag
+from ._get import get_repo_branching_model, get_resolver_class, get_resolver_from_snapshot
+
+__all__ = ["record_resolution", "replay_resolution", "ReplayRepo", "ResolutionRecord"]
+
+RECORD_FORMAT = 1
+
+
+class ResolutionRecord(NamedTuple):
+    """
+    Everything a resolver reads to resolve the version of the HEAD of a repository: its branch and commit, the version
+    tags, the branches (the release branches give the latest release candidate version), the tagged commits visible
+    from HEAD and the branching model. The outcome of the resolution is recorded as well so that replays can be checked
+    against it.
+    """
+
+    branch: str
+    commit_sha: str
+    snapshot: RefSnapshot
+    continuous_deployment: bool
+    branching_model: Optional[BranchingModel] = None
+    version: Optional[Version] = None
+    error: Optional[str] = None
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "format": RECORD_FORMAT,
+                "continuous_deployment": self.continuous_deployment,
+                "branching_model": self.branching_model.config if self.branching_model else None,
+                "branch": self.branch,
+                "commit": self.commit_sha,
+                "tags": {tag.name: tag.commit_sha for tag in self.snapshot.tags},
+                "branches": dict(self.snapshot.branches),
+                "visible": sorted(self.snapshot.visible_commits.get(self.commit_sha, ())),
+                "version": self.version.text if self.version else None,
+                "error": self.error,
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, content: str) -> "ResolutionRecord":
+        record: Dict[str, Any] = json.loads(content)
+        if record.get("format") != RECORD_FORMAT:
+            raise ValueError(f"Unsupported resolution record format: {record.get('format')}.")
+        tags = []
+        for name, commit_sha in record["tags"].items():
+            version = from_tag(name)
+            if version:
+                tags.append(VersionTag(name, commit_sha, version))
+        snapshot = RefSnapshot(tags, record["branches"], {record["commit"]: frozenset(record["visible"])})
+        branching_model = record.get("branching_model")
+        return cls(
+            record["branch"],
+            record["commit"],
+            snapshot,
+            record["continuous_deployment"],
+            BranchingModel.from_config(branching_model) if branching_model is not None else None,
+            Version.parse(record["version"]) if record["version"] else None,
+            record["error"],
+        )
+
+
+class ReplayRepo:
+    """
+    Stands in for the repository of a recorded resolution: it only exposes its HEAD and its branches, without git.
+    """
+
+    def __init__(self, record: ResolutionRecord):
+        is_detached = record.branch == DETACHED_HEAD
+        self.head = SimpleNamespace(
+            commit=SimpleNamespace(hexsha=record.commit_sha),
+            is_detached=is_detached,
+            ref=None if is_detached else SimpleNamespace(name=record.branch),
+        )
+        self.heads: List[SimpleNamespace] = [SimpleNamespace(name=branch) for branch in record.snapshot.branches]
+
+
+def record_resolution(repo: Repo) -> ResolutionRecord:
+    """
+    Records what resolving the version of the HEAD of the repository reads, together with the outcome.
+    """
+    commit_sha, snapshot = HeadRefSnapshot(repo).refresh()
+    branching_model = get_repo_branching_model(repo)
+    branch = get_resolver_class(repo, branching_model=branching_model).get_branch_name(repo)
+    record = ResolutionRecord(branch, commit_sha, snapshot, CONTINUOUS_DEPLOYMENT, branching_model)
+    version, error = _resolve(repo, record)
+    return record._replace(version=version, error=error)
+
+
+def replay_resolution(record: ResolutionRecord) -> ResolutionRecord:
+    """
+    Resolves the version of a recorded resolution again without git. Returns the record with the outcome of the
+    replay, to compare with the recorded one.
+    """
+    version, error = _resolve(cast(Repo, ReplayRepo(record)), record)
+    return record._replace(version=version, error=error)
+
+
+def _resolve(repo: Repo, record: ResolutionRecord) -> Tuple[Optional[Version], Optional[str]]:
+    try:
+        resolver = get_resolver_from_snapshot(
+            repo,
+            record.snapshot,
+            record.branch,
+            record.commit_sha,
+            branching_model=record.branching_model,
+            continuous_deployment=record.continuous_deployment,
+        )
+        return resolver.resolve_version(), None
+    except (VersionResolutionError, NotImplementedError) as e:
+        return None, f"{type(e).__name__}: {e}"
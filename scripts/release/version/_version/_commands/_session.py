@@ -0,0 +1,105 @@
+from pathlib import Path
+from threading import RLock
+from typing import NamedTuple, Optional
+
+from git import Repo
+from poetry.core.semver import Version
+
+from .._providers import VersionProviderFromSnapshot
+from .._resolvers import BranchBasedVersionResolver
+from .._snapshot import HeadRefSnapshot, RefSnapshot
+from .._stages import get_stage, Stage
+from ._add import add_version_to_project
+from ._get import get_resolver_class, get_resolver_from_snapshot
+from ._tag import tag_version
+
+__all__ = ["VersionSession"]
+
+
+class _SessionState(NamedTuple):
+    head_ref: Optional[str]
+    branch: str
+    commit_sha: str
+    snapshot: RefSnapshot
+    resolver: BranchBasedVersionResolver
+
+
+class VersionSession:
+    """
+    Keeps the tag snapshot and the resolver of the HEAD of a repository between calls, so that repeated get, tag and
+    stamp operations within one build do not rescan the repository. The state is rebuilt when HEAD moves (another
+    commit or another branch is checked out) or after the session tagged a commit. Tags created outside of the session
+    are only seen after a call to invalidate.
+    The session is thread-safe: operations are serialized.
+    """
+
+    def __init__(self, repo: Repo):
+        self._repo = repo
+        self._lock = RLock()
+        self._head_snapshot = HeadRefSnapshot(repo)
+        self._state: Optional[_SessionState] = None
+        self._resolved_version: Optional[Version] = None
+        self._is_resolved = False
+
+    @property
+    def repo(self) -> Repo:
+        return self._repo
+
+    def get_version(self, *, infer: bool = False, include_alpha: bool = False) -> Optional[Version]:
+        """
+        Same as get_version, reusing the state of the session.
+        """
+        with self._lock:
+            state = self._get_state()
+            if infer:
+                if not self._is_resolved:
+                    self._resolved_version = state.resolver.resolve_version()
+                    self._is_resolved = True
+                version = self._resolved_version
+            else:
+                version = VersionProviderFromSnapshot(state.snapshot, state.commit_sha).get_current_version()
+
+        if version and not include_alpha and get_stage(version) is Stage.ALPHA:
+            return None
+        return version
+
+    def tag_version(self, version: Version, *, push_tag: bool = False, force_tag: bool = False) -> bool:
+        """
+        Same as tag_version. The state of the session is refreshed on the next operation.
+        """
+        with self._lock:
+            try:
+                return tag_version(self._repo, version, push_tag=push_tag, force_tag=force_tag)
+            finally:
+                self.invalidate()
+
+    def add_version_to_project(self, version: Version) -> None:
+        """
+        Same as add_version_to_project for the project in the working tree of the repository. Stamping the project does
+        not change the state of the session.
+        """
+        if self._repo.working_tree_dir is None:
+            raise ValueError("The version cannot be added to the project of a bare repository.")
+        with self._lock:
+            add_version_to_project(version, project_dir=Path(self._repo.working_tree_dir))
+
+    def invalidate(self) -> None:
+        """
+        Forces the state of the session to be refreshed on the next operation. Only the tags that changed are parsed
+        again.
+        """
+        with self._lock:
+            self._state = None
+            self._is_resolved = False
+
+    def _get_state(self) -> _SessionState:
+        head = self._repo.head
+        head_ref = None if head.is_detached else head.ref.name
+        if self._state is None or (self._state.head_ref, self._state.commit_sha) != (head_ref, head.commit.hexsha):
+            commit_sha, snapshot = self._head_snapshot.refresh()
+            # the branch of a detached head is looked up only when the state is rebuilt
+            branch = get_resolver_class(self._repo).get_branch_name(self._repo)
+            resolver = get_resolver_from_snapshot(self._repo, snapshot, branch, commit_sha)
+            self._state = _SessionState(head_ref, branch, commit_sha, snapshot, resolver)
+            self._is_resolved = False
+        return self._state
@@ -1,7 +1,9 @@
+from io import BytesIO
 from logging import getLogger
 from typing import Optional
 
-from git import Repo
+from git import GitCommandError, PushInfo, Repo
+from gitdb import IStream
 from poetry.core.semver import Version
 
 from .._config import VERSION_TAG_COMMIT_MESSAGE_FORMAT
@@ -11,24 +13,78 @@ __all__ = ["tag_version"]
 
 logger = getLogger(__name__)
 
+TAG_REF_FORMAT = "refs/tags/{tag}"
+_PUSH_FAILURE_FLAGS = PushInfo.REJECTED | PushInfo.REMOTE_REJECTED | PushInfo.REMOTE_FAILURE | PushInfo.ERROR
 
-def tag_version(repo: Repo, version: Version, *, push_tag: bool = False, force_tag: bool = False) -> None:
 
-    tag = to_tag(version)
+def tag_version(repo: Repo, version: Version, *, push_tag: bool = False, force_tag: bool = False) -> bool:
+    """
+    Tags the current commit with the version provided. Returns True if the tag was created and False if the commit was
+    already tagged with the version.
+    The tag ref is looked up on its own and created with a compare-and-swap: the update only succeeds if the ref does
+    not exist yet. Concurrent jobs tagging the same commit in the same clone therefore all succeed, exactly one of them
+    creating the tag. Jobs with their own clone race on the push instead: the push of the losing job is rejected, and
+    it gets the same result once the tag of the remote repository is fetched.
+    """
+    tag = str(to_tag(version))
+    ref = TAG_REF_FORMAT.format(tag=tag)
+    commit_sha = repo.head.commit.hexsha
 
-    if tag in repo.tags:
-        if repo.tags[tag].commit == repo.head.commit:
-            logger.info("The version: %s is already tagged on the commit: %s", version.text, repo.head.commit.hexsha)
-            return
-        if not force_tag:
-            raise ValueError(
-                "The version: %s is has already been tagged on another commit: %s. "
-                "I cannot apply it to the current commit.",
-                version.text,
-            )
+    tagged_commit_sha = _get_tagged_commit_sha(repo, ref)
+    if tagged_commit_sha == commit_sha or (tagged_commit_sha is not None and not force_tag):
+        return _check_already_tagged(version, tagged_commit_sha, commit_sha)
 
-    commit_message = VERSION_TAG_COMMIT_MESSAGE_FORMAT.format(commit_sha=repo.head.commit.hexsha, version=version.text)
-    new_tag = repo.create_tag(tag, message=commit_message, force_tag=force_tag)
+    commit_message = VERSION_TAG_COMMIT_MESSAGE_FORMAT.format(commit_sha=commit_sha, version=version.text)
+    tag_object_sha = _create_tag_object(repo, tag, commit_sha, commit_message)
+    try:
+        # an empty old value makes the update fail if the ref already exists
+        repo.git.update_ref(ref, tag_object_sha, *(() if force_tag else ("",)))
+    except GitCommandError:
+        tagged_commit_sha = _get_tagged_commit_sha(repo, ref)
+        if tagged_commit_sha is None:
+            raise
+        # another job created the tag between the lookup and the update
+        return _check_already_tagged(version, tagged_commit_sha, commit_sha)
 
     if push_tag:
-        repo.remotes.origin.push(new_tag)
+        return _push_tag(repo, version, ref, commit_sha, force=force_tag)
+    return True
+
+
+def _push_tag(repo: Repo, version: Version, ref: str, commit_sha: str, *, force: bool) -> bool:
+    """
+    Pushes the tag ref to the origin remote. If the push is rejected, the tag of the remote repository is fetched: the
+    tag of another job on the same commit replaces the local tag and False is returned, as if it had been found before
+    tagging.
+    """
+    push_infos = repo.remotes.origin.push(ref, force=force)
+    if push_infos and not any(push_info.flags & _PUSH_FAILURE_FLAGS for push_info in push_infos):
+        return True
+
+    # the tag is fetched in FETCH_HEAD only: the local tag is kept if the remote tag is on another commit
+    repo.remotes.origin.fetch(ref)
+    remote_tag_sha = repo.git.rev_parse("FETCH_HEAD")
+    _check_already_tagged(version, repo.git.rev_parse("FETCH_HEAD^{commit}"), commit_sha)
+    repo.git.update_ref(ref, remote_tag_sha)
+    return False
+
+
+def _get_tagged_commit_sha(repo: Repo, ref: str) -> Optional[str]:
+    commit_sha = repo.git.rev_parse(f"{ref}^{{commit}}", verify=True, quiet=True, with_exceptions=False)
+    return commit_sha or None
+
+
+def _check_already_tagged(version: Version, tagged_commit_sha: str, commit_sha: str) -> bool:
+    if tagged_commit_sha == commit_sha:
+        logger.info("The version: %s is already tagged on the commit: %s", version.text, commit_sha)
+        return False
+    raise ValueError(
+        f"The version: {version.text} has already been tagged on another commit: {tagged_commit_sha}. "
+        f"I cannot apply it to the current commit."
+    )
+
+
+def _create_tag_object(repo: Repo, tag: str, commit_sha: str, message: str) -> str:
+    tagger = repo.git.var("GIT_COMMITTER_IDENT")
+    content = f"object {commit_sha}\ntype commit\ntag {tag}\ntagger {tagger}\n\n{message}\n".encode()
+    return repo.odb.store(IStream(b"tag", len(content), BytesIO(content))).hexsha.decode()
@@ -0,0 +1,84 @@
+from logging import getLogger
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+
+from git import Repo
+from poetry.core.semver import Version
+
+from .._providers import VersionProviderFromSnapshot
+from .._resolvers import VersionResolutionError
+from .._snapshot import HeadRefSnapshot
+from .._stages import get_stage, Stage
+from .._watch import IRefWatcher, get_ref_watcher
+from ._get import get_resolver_class, get_resolver_from_snapshot
+
+__all__ = ["iter_versions", "watch_version"]
+
+logger = getLogger(__name__)
+
+_NOT_RESOLVED = object()
+
+
+def iter_versions(
+    repo: Repo, *, infer: bool = False, include_alpha: bool = False, watcher: Optional[IRefWatcher] = None
+) -> Iterator[Optional[Version]]:
+    """
+    Yields the version of the package, then yields it again every time it changes. The refs of the repository are
+    watched for changes. On each change the tag snapshot is updated incrementally and only the version resolution is
+    re-run. Resolution errors are logged and the version is resolved again on the next change.
+    """
+    head_snapshot = HeadRefSnapshot(repo)
+    watcher = watcher or get_ref_watcher(Path(repo.git_dir))
+    last_version = _NOT_RESOLVED
+    try:
+        while True:
+            try:
+                version = _resolve_version(repo, head_snapshot, infer=infer, include_alpha=include_alpha)
+            except VersionResolutionError as e:
+                logger.error("The version could not be resolved: %s", e)
+            else:
+                if last_version is _NOT_RESOLVED or version != last_version:
+                    last_version = version
+                    yield version
+            watcher.wait()
+    finally:
+        watcher.close()
+
+
+def watch_version(
+    repo: Repo,
+    *,
+    infer: bool = False,
+    include_alpha: bool = False,
+    output_path: Optional[Path] = None,
+    poll_interval: float = 1.0,
+) -> None:
+    """
+    Writes the version of the package to stdout or to the file provided every time it changes. The file is replaced
+    atomically so that readers never see a partially written version.
+    """
+    watcher = get_ref_watcher(Path(repo.git_dir), poll_interval=poll_interval)
+    for version in iter_versions(repo, infer=infer, include_alpha=include_alpha, watcher=watcher):
+        text = version.text if version else ""
+        if output_path is None:
+            print(text, flush=True)
+        else:
+            temporary_path = output_path.with_name(f".{output_path.name}.tmp")
+            temporary_path.write_text(f"{text}\n")
+            os.replace(temporary_path, output_path)
+
+
+def _resolve_version(
+    repo: Repo, head_snapshot: HeadRefSnapshot, *, infer: bool, include_alpha: bool
+) -> Optional[Version]:
+    commit_sha, snapshot = head_snapshot.refresh()
+    if infer:
+        branch = get_resolver_class(repo).get_branch_name(repo)
+        version = get_resolver_from_snapshot(repo, snapshot, branch, commit_sha).resolve_version()
+    else:
+        version = VersionProviderFromSnapshot(snapshot, commit_sha).get_current_version()
+
+    if version and not include_alpha and get_stage(version) is Stage.ALPHA:
+        return None
+    return version
@@ -0,0 +1,27 @@
+import os
+from pathlib import Path
+from typing import Mapping
+from zipfile import ZipFile
+
+from poetry.core.masonry.builders.wheel import WheelBuilder
+from poetry.core.poetry import Poetry
+
+__all__ = ["StampedWheelBuilder"]
+
+
+class StampedWheelBuilder(WheelBuilder):
+    """
+    Adds the stamped content of the files provided to the wheel instead of their content on disk.
+    """
+
+    def __init__(self, poetry: Poetry, stamped_files: Mapping[Path, str], **kwargs: Path):
+        super().__init__(poetry, **kwargs)
+        self._stamped_files = stamped_files
+
+    def _add_file(self, wheel: ZipFile, full_path: Path, rel_path: Path) -> None:
+        content = self._stamped_files.get(Path(full_path).resolve())
+        if content is None:
+            super()._add_file(wheel, full_path, rel_path)
+            return
+        with self._write_to_zip(wheel, str(rel_path).replace(os.sep, "/")) as file:
+            file.write(content)
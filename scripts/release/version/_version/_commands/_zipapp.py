@@ -0,0 +1,100 @@
+import compileall
+from importlib.util import find_spec
+from logging import getLogger
+from pathlib import Path
+from py_compile import PycInvalidationMode
+import shutil
+import statistics
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+import time
+from typing import List, NamedTuple, Optional, Sequence
+import zipapp
+
+from .._config import PROJECT_DIR, ZIPAPP_PATH
+
+__all__ = ["build_zipapp", "ColdStart", "measure_cold_start"]
+
+logger = getLogger(__name__)
+
+ZIPAPP_MAIN = "version.__main__:main"
+# the modules the tool imports at runtime, optional ones are shipped when they are installed
+ZIPAPP_MODULES = ("git", "gitdb", "smmap", "poetry.core")
+ZIPAPP_OPTIONAL_MODULES = ("typing_extensions", "inotify_simple")
+IGNORED_FILES = shutil.ignore_patterns("__pycache__", "*.pyc", "*.pyo")
+
+VERSION_PACKAGE_DIR = Path(__file__).parent.parent.parent
+
+
+class ColdStart(NamedTuple):
+    command: Sequence[str]
+    best: float
+    median: float
+
+
+def build_zipapp(
+    output_path: Path = ZIPAPP_PATH, *, interpreter: Optional[str] = "/usr/bin/env python3", compress: bool = False
+) -> Path:
+    """
+    Packages the version tool and the modules it imports into a single executable zipapp, run as: python version.pyz
+    get. Modules are shipped with their bytecode, compiled by the current interpreter: other interpreters fall back on
+    the sources. The archive is not compressed by default so that imports do not pay for decompression.
+    """
+    with TemporaryDirectory() as staging_dir:
+        staging_path = Path(staging_dir)
+        shutil.copytree(VERSION_PACKAGE_DIR, staging_path / VERSION_PACKAGE_DIR.name, ignore=IGNORED_FILES)
+        for module in ZIPAPP_MODULES:
+            _copy_module(module, staging_path)
+        for module in ZIPAPP_OPTIONAL_MODULES:
+            if find_spec(module) is not None:
+                _copy_module(module, staging_path)
+            else:
+                logger.info("The optional module: %s is not installed, it is not shipped", module)
+
+        # zipimport only loads the bytecode stored next to the sources and unchecked hashes spare it the comparison of
+        # modification times, which the 2 seconds resolution of zip timestamps makes unreliable
+        compileall.compile_dir(
+            staging_dir, quiet=1, legacy=True, invalidation_mode=PycInvalidationMode.UNCHECKED_HASH, workers=0
+        )
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        zipapp.create_archive(
+            staging_path, output_path, interpreter=interpreter, main=ZIPAPP_MAIN, compressed=compress
+        )
+    logger.info("Built %s: %.2fMB", output_path, output_path.stat().st_size / 1e6)
+    return output_path
+
+
+def measure_cold_start(
+    zipapp_path: Path, arguments: Sequence[str] = ("get",), *, runs: int = 5, cwd: Path = PROJECT_DIR
+) -> ColdStart:
+    """
+    Runs the zipapp with the arguments provided in new interpreters and returns the best and median wall-clock times.
+    """
+    command = [sys.executable, str(zipapp_path), *arguments]
+    durations: List[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start)
+    return ColdStart(command, min(durations), statistics.median(durations))
+
+
+def _copy_module(module: str, staging_path: Path) -> None:
+    spec = find_spec(module)
+    if spec is None or spec.origin is None and not spec.submodule_search_locations:
+        raise ValueError(f"The module: {module} is not installed.")
+
+    target_path = staging_path.joinpath(*module.split("."))
+    if "." in module:
+        # the parent packages are shipped without their other modules, f.ex. poetry for poetry.core
+        parent_spec = find_spec(module.rsplit(".", 1)[0])
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        if parent_spec is not None and parent_spec.origin and parent_spec.origin.endswith("__init__.py"):
+            shutil.copy2(parent_spec.origin, target_path.parent / "__init__.py")
+
+    if spec.submodule_search_locations:
+        shutil.copytree(list(spec.submodule_search_locations)[0], target_path, ignore=IGNORED_FILES)
+    else:
+        shutil.copy2(str(spec.origin), target_path.with_suffix(".py"))
@@ -1,6 +1,9 @@
 from pathlib import Path
+from typing import Optional
 
 __all__ = [
+    "AUDIT_CHUNK_SIZE",
+    "BUILD_FORMATS",
     "CONTINUOUS_DEPLOYMENT",
     "DEVELOP",
     "DETACHED_HEAD",
@@ -9,16 +12,33 @@ __all__ = [
     "HOTFIX",
     "MASTER",
     "PROJECT_DIR",
+    "PUBLISH_REPOSITORY_URL",
     "RELEASE",
+    "STREAM_VERSION_TAGS",
+    "SUPPORT",
     "VERSION_FILE_NAME",
+    "VERSION_REGISTRY_PATH",
     "VERSION_TAG_STRING_FORMAT",
     "VERSION_TAG_COMMIT_MESSAGE_FORMAT",
+    "ZIPAPP_PATH",
 ]
 
 CONTINUOUS_DEPLOYMENT = False
 FEATURE, DEVELOP, RELEASE, MASTER, HOTFIX, DETACHED_HEAD = "feature", "develop", "release", "master", "hotfix", "head"
+SUPPORT = "support"
 HASH_SIZE = 8
-PROJECT_DIR = Path(__file__).parent.parent.parent.parent.parent
+# the tool lives in scripts/release of the project, except when it runs from a zipapp: then the project is the current
+# directory
+PROJECT_DIR = Path(__file__).parent.parent.parent.parent.parent if Path(__file__).is_file() else Path.cwd()
+PUBLISH_REPOSITORY_URL = "https://upload.pypi.org/legacy/"
+BUILD_FORMATS = ("wheel", "sdist")
+# the number of tags classified at once by a process of the tag audit
+AUDIT_CHUNK_SIZE = 5000
+ZIPAPP_PATH = PROJECT_DIR / "build" / "version.pyz"
+# tags are streamed and folded into the latest versions instead of being loaded in memory if it is set
+STREAM_VERSION_TAGS = False
 VERSION_FILE_NAME = "__init__.py"
+# versions are read from this registry instead of the tags of the repository if it is set
+VERSION_REGISTRY_PATH: Optional[Path] = None
 VERSION_TAG_STRING_FORMAT = "v{version}"
 VERSION_TAG_COMMIT_MESSAGE_FORMAT = "tagging commit: {commit_sha} with version: {version}"
@@ -0,0 +1,96 @@
+"""
+Indexes of versions answering latest version queries: a sorted index searched by bisection and maxima folded as
+versions are added.
+"""
+from bisect import bisect_left, bisect_right
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+from poetry.core.semver import Version
+
+from ._stages import get_stage, Stage
+
+__all__ = ["VersionIndex", "VersionMaxima"]
+
+_Key = TypeVar("_Key", bound=Hashable)
+
+
+class _SortedVersions:
+    def __init__(self, versions: Iterable[Version]):
+        self.versions: List[Version] = sorted(versions)
+        self.lines: List[Tuple[int, int]] = [(version.major, version.minor) for version in self.versions]
+
+    def latest(self) -> Optional[Version]:
+        return self.versions[-1] if self.versions else None
+
+    def latest_in_line(self, line: Tuple[int, int]) -> Optional[Version]:
+        # versions are sorted by major, minor and patch first, so the versions of a line are contiguous
+        end = bisect_right(self.lines, line)
+        return self.versions[end - 1] if end > bisect_left(self.lines, line, hi=end) else None
+
+
+class VersionIndex:
+    """
+    Versions sorted once, overall and per stage, so that the latest version of a stage or of a release line (all the
+    versions sharing a major and minor version) is found in logarithmic time instead of scanning every version.
+    """
+
+    def __init__(self, versions: Iterable[Version]):
+        versions = list(versions)
+        versions_per_stage: Dict[Stage, List[Version]] = {stage: [] for stage in Stage.__members__.values()}
+        for version in versions:
+            versions_per_stage[get_stage(version)].append(version)
+        self._all = _SortedVersions(versions)
+        self._per_stage = {stage: _SortedVersions(vs) for stage, vs in versions_per_stage.items()}
+
+    def __len__(self) -> int:
+        return len(self._all.versions)
+
+    def get_latest_version(self, in_stage: Optional[Stage] = None) -> Optional[Version]:
+        """
+        Returns the latest version, in the stage provided if any.
+        """
+        return (self._per_stage[in_stage] if in_stage else self._all).latest()
+
+    def get_latest_version_in_line(self, major: int, minor: int, in_stage: Optional[Stage] = None) -> Optional[Version]:
+        """
+        Returns the latest version of the release line major.minor, in the stage provided if any.
+        """
+        return (self._per_stage[in_stage] if in_stage else self._all).latest_in_line((major, minor))
+
+
+class VersionMaxima:
+    """
+    The latest versions, overall and per stage, of all the versions added and of each release line, folded as versions
+    are added. Versions are not kept: memory grows with the number of release lines, not with the number of versions.
+    Answers the same queries as VersionIndex.
+    """
+
+    def __init__(self, versions: Iterable[Version] = ()):
+        self._latest: Dict[Optional[Stage], Version] = {}
+        self._latest_in_line: Dict[Tuple[int, int, Optional[Stage]], Version] = {}
+        for version in versions:
+            self.add(version)
+
+    def add(self, version: Version) -> None:
+        for stage in (None, get_stage(version)):
+            _fold(self._latest, stage, version)
+            _fold(self._latest_in_line, (version.major, version.minor, stage), version)
+
+    def get_latest_version(self, in_stage: Optional[Stage] = None) -> Optional[Version]:
+        """
+        Returns the latest version, in the stage provided if any.
+        """
+        return self._latest.get(in_stage)
+
+    def get_latest_version_in_line(self, major: int, minor: int, in_stage: Optional[Stage] = None) -> Optional[Version]:
+        """
+        Returns the latest version of the release line major.minor, in the stage provided if any.
+        """
+        return self._latest_in_line.get((major, minor, in_stage))
+
+
+def _fold(latest_versions: Dict[_Key, Version], key: _Key, version: Version) -> None:
+    # the last of equal versions is kept, as sorting does
+    latest_version = latest_versions.get(key)
+    if latest_version is None or version >= latest_version:
+        latest_versions[key] = version
@@ -0,0 +1,131 @@
+"""
+Branching models declared in the [tool.version] table of pyproject.toml, f.ex.:
+
+    [tool.version]
+    flow = "git-flow"
+    release-branch-pattern = "^release/(?P<version>\\d+\\.\\d+)$"
+
+    [tool.version.branches]
+    develop = { stage = "alpha", full-name = true }
+    release = { stage = "rc" }
+    main = { stage = "release", full-name = true }
+
+A model is compiled once into a resolver class: a lookup table from the root of a branch name to its stage and
+precompiled branch patterns. Compiled models are cached per pyproject.toml file until the file changes.
+"""
+from functools import lru_cache
+from pathlib import Path
+import re
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Type
+
+from poetry.core.toml import TOMLFile
+
+from ._resolvers import (
+    BranchBasedVersionResolver,
+    ContinuousDeploymentVersionResolver,
+    GitFlowReleaseVersionResolver,
+    StageInfo,
+)
+from ._stages import Stage
+
+__all__ = ["BranchingModel", "BranchingModelError", "get_branching_model"]
+
+FLOWS: Mapping[str, Type[BranchBasedVersionResolver]] = {
+    "git-flow": GitFlowReleaseVersionResolver,
+    "continuous-deployment": ContinuousDeploymentVersionResolver,
+}
+# settings of the model overriding the attribute of the same name of the resolver class, with their group names
+PATTERN_SETTINGS = {
+    "release-branch-pattern": ("release_branch_pattern", {"version"}),
+    "support-branch-pattern": ("support_branch_pattern", {"major", "minor"}),
+}
+
+
+class BranchingModelError(ValueError):
+    pass
+
+
+class BranchingModel(NamedTuple):
+    config: Mapping[str, Any]
+    resolver_class: Type[BranchBasedVersionResolver]
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> "BranchingModel":
+        """
+        Compiles the branching model declared in the [tool.version] table provided.
+        """
+        flow = config.get("flow", "git-flow")
+        if flow not in FLOWS:
+            raise BranchingModelError(f"Unknown flow: {flow}. Valid flows are: {list(FLOWS)}.")
+        base_class = FLOWS[flow]
+
+        attributes: Dict[str, Any] = {}
+        if "branches" in config:
+            attributes["branch_to_stage"] = [
+                _to_stage_info(branch, branch_config) for branch, branch_config in config["branches"].items()
+            ]
+        if "disallow-special-branch-names-without-stage" in config:
+            attributes["disallow_special_branch_names_without_stage"] = bool(
+                config["disallow-special-branch-names-without-stage"]
+            )
+        for setting, (attribute, groups) in PATTERN_SETTINGS.items():
+            if setting in config:
+                if not hasattr(base_class, attribute):
+                    raise BranchingModelError(f"The flow: {flow} does not support the setting: {setting}.")
+                attributes[attribute] = _compile_pattern(setting, str(config[setting]), groups)
+
+        resolver_class = type(f"Declared{base_class.__name__}", (base_class,), attributes)
+        return cls(config, resolver_class)
+
+
+def get_branching_model(pyproject_path: Path) -> Optional[BranchingModel]:
+    """
+    Returns the branching model declared in the pyproject.toml file provided or None if it does not declare one.
+    """
+    try:
+        stat = pyproject_path.stat()
+    except FileNotFoundError:
+        return None
+    return _load_branching_model(pyproject_path.resolve(), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=16)
+def _load_branching_model(pyproject_path: Path, mtime_ns: int, size: int) -> Optional[BranchingModel]:
+    # the modification time and size of the file are part of the cache key so that changes are picked up
+    config = TOMLFile(pyproject_path).read().get("tool", {}).get("version")
+    return BranchingModel.from_config(_to_builtin(config)) if config is not None else None
+
+
+def _to_stage_info(branch: str, branch_config: Mapping[str, Any]) -> StageInfo:
+    stage_value = branch_config.get("stage")
+    stage = next((stage for stage in Stage.__members__.values() if stage.value == stage_value), None)
+    if stage is None:
+        raise BranchingModelError(
+            f"The branch: {branch} has an invalid stage: {stage_value}. Valid stages are: "
+            f"{[stage.value for stage in Stage.__members__.values()]}."
+        )
+    return StageInfo(branch, bool(branch_config.get("full-name", False)), stage)
+
+
+def _compile_pattern(setting: str, pattern: str, groups: set) -> "re.Pattern[str]":
+    try:
+        compiled_pattern = re.compile(pattern)
+    except re.error as e:
+        raise BranchingModelError(f"The {setting}: {pattern} is not a valid regex pattern: {e}.")
+    missing_groups = groups - set(compiled_pattern.groupindex)
+    if missing_groups:
+        raise BranchingModelError(f"The {setting}: {pattern} is missing the groups: {sorted(missing_groups)}.")
+    return compiled_pattern
+
+
+def _to_builtin(value: Any) -> Any:
+    # tomlkit containers are converted to plain dicts and lists so that models can be serialized
+    if isinstance(value, Mapping):
+        return {str(key): _to_builtin(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_to_builtin(item) for item in value]
+    if isinstance(value, bool):
+        return bool(value)
+    if isinstance(value, str):
+        return str(value)
+    return value
@@ -1,15 +1,22 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Iterable, Optional
 
 from git import Repo
 from poetry.core.semver import Version
 
+from ._index import VersionIndex, VersionMaxima
+from ._registry import VersionRegistry
+from ._snapshot import get_visible_commits, iter_version_tags, read_ref_listing, RefSnapshot
 from ._tags import get_versions
-from ._stages import Stage, get_stage
+from ._stages import Stage
 
 __all__ = [
     "IVersionProvider",
     "ProvideVersionError",
+    "VersionProviderFromRefListing",
+    "VersionProviderFromRegistry",
+    "VersionProviderFromSnapshot",
+    "VersionProviderFromTagStream",
     "VersionProviderFromTags",
     "VersionProviderFromTagsVisibleFromCommit",
 ]
@@ -40,6 +47,15 @@ class IVersionProvider(ABC):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def get_latest_version_in_line(self, major: int, minor: int, in_stage: Optional[Stage] = None) -> Optional[Version]:
+        """
+        Retrieves the latest version of a package in the release line major.minor, in a given stage if provided (f.ex.
+        the latest patch of 1.2 or the latest release candidate of 1.2).
+        Returns None if no version of the package was ever produced in the release line.
+        """
+        raise NotImplementedError()
+
 
 class VersionProviderFromTags(IVersionProvider):
     """
@@ -48,14 +64,17 @@ class VersionProviderFromTags(IVersionProvider):
     """
 
     def __init__(self, repo: Repo):
-        self._all_versions = get_versions(repo)
+        self._all_versions = VersionIndex(get_versions(repo))
         self._current_versions = get_versions(repo, lambda tag, _: repo.head.commit == tag.commit)
 
     def get_current_version(self) -> Optional[Version]:
         return max(self._current_versions) if self._current_versions else None
 
     def get_latest_version(self, in_stage: Optional[Stage] = None) -> Optional[Version]:
-        return max((vs for vs in self._all_versions if (get_stage(vs) is in_stage if in_stage else True)), default=None)
+        return self._all_versions.get_latest_version(in_stage)
+
+    def get_latest_version_in_line(self, major: int, minor: int, in_stage: Optional[Stage] = None) -> Optional[Version]:
+        return self._all_versions.get_latest_version_in_line(major, minor, in_stage)
 
 
 class VersionProviderFromTagsVisibleFromCommit(IVersionProvider):
@@ -66,8 +85,8 @@ class VersionProviderFromTagsVisibleFromCommit(IVersionProvider):
     """
 
     def __init__(self, repo: Repo):
-        self._all_versions = get_versions(
-            repo, lambda tag, _: tag.commit in repo.merge_base(tag.commit, repo.head.commit)
+        self._all_versions = VersionIndex(
+            get_versions(repo, lambda tag, _: tag.commit in repo.merge_base(tag.commit, repo.head.commit))
         )
         self._current_versions = get_versions(repo, lambda tag, _: repo.head.commit == tag.commit)
 
@@ -75,4 +94,118 @@ class VersionProviderFromTagsVisibleFromCommit(IVersionProvider):
         return max(self._current_versions) if self._current_versions else None
 
     def get_latest_version(self, in_stage: Optional[Stage] = None) -> Optional[Version]:
-        return max(self._all_versions) if self._all_versions else None
+        return self._all_versions.get_latest_version()
+
+    def get_latest_version_in_line(self, major: int, minor: int, in_stage: Optional[Stage] = None) -> Optional[Version]:
+        return self._all_versions.get_latest_version_in_line(major, minor, in_stage)
+
+
+class VersionProviderFromTagStream(IVersionProvider):
+    """
+    This provider can be used if versions are stamped in a repository via git tags.
+    The versions are fixed on provider instantiation to ensure consistency.
+    The tags are streamed from git and folded into the versions of the current commit and the latest versions per stage
+    and per release line, so that memory does not grow with the number of tags.
+    If visible is set, this provider only considers commits that are visible from the current commit.
+    """
+
+    def __init__(self, repo: Repo, *, visible: bool = False):
+        head_sha = repo.head.commit.hexsha
+        self._latest_versions = VersionMaxima()
+        self._current_version: Optional[Version] = None
+        for tag in iter_version_tags(repo, merged=head_sha if visible else None):
+            self._latest_versions.add(tag.version)
+            if tag.commit_sha == head_sha and (self._current_version is None or tag.version > self._current_version):
+                self._current_version = tag.version
+
+    def get_current_version(self) -> Optional[Version]:
+        return self._current_version
+
+    def get_latest_version(self, in_stage: Optional[Stage] = None) -> Optional[Version]:
+        return self._latest_versions.get_latest_version(in_stage)
+
+    def get_latest_version_in_line(self, major: int, minor: int, in_stage: Optional[Stage] = None) -> Optional[Version]:
+        return self._latest_versions.get_latest_version_in_line(major, minor, in_stage)
+
+
+class VersionProviderFromSnapshot(IVersionProvider):
+    """
+    This provider reads versions from a snapshot of the refs of a repository so that versions can be provided for many
+    commits from a single scan of the repository.
+    If visible is set, this provider only considers commits that are visible from the commit provided.
+    """
+
+    def __init__(self, snapshot: RefSnapshot, commit_sha: str, *, visible: bool = False):
+        self._all_versions = VersionIndex(snapshot.get_versions(commit_sha if visible else None, visible=visible))
+        self._current_versions = snapshot.get_versions(commit_sha)
+
+    def get_current_version(self) -> Optional[Version]:
+        return max(self._current_versions) if self._current_versions else None
+
+    def get_latest_version(self, in_stage: Optional[Stage] = None) -> Optional[Version]:
+        return self._all_versions.get_latest_version(in_stage)
+
+    def get_latest_version_in_line(self, major: int, minor: int, in_stage: Optional[Stage] = None) -> Optional[Version]:
+        return self._all_versions.get_latest_version_in_line(major, minor, in_stage)
+
+
+class VersionProviderFromRefListing(VersionProviderFromSnapshot):
+    """
+    This provider reads versions from a listing of refs in the format of git ls-remote or git show-ref -d, f.ex. read
+    from stdin, so that versions are provided without a clone of the repository. The listing is read once and tags are
+    parsed as they are read. The ancestry of commits is not listed: all versions are considered.
+    The current version is the version of the commit provided, else of the head of the branch provided, else of HEAD.
+    """
+
+    def __init__(self, lines: Iterable[str], commit_sha: Optional[str] = None, *, branch: Optional[str] = None):
+        head_sha, self._snapshot = read_ref_listing(lines)
+        commit_sha = commit_sha or (self._snapshot.branches.get(branch) if branch else head_sha)
+        if commit_sha is None:
+            raise ProvideVersionError(
+                f"The listing of refs does not list {f'the branch: {branch}' if branch else 'HEAD'}. Provide a commit."
+            )
+        self._commit_sha = commit_sha
+        super().__init__(self._snapshot, commit_sha)
+
+    @property
+    def snapshot(self) -> RefSnapshot:
+        return self._snapshot
+
+    @property
+    def commit_sha(self) -> str:
+        return self._commit_sha
+
+
+class VersionProviderFromRegistry(IVersionProvider):
+    """
+    This provider reads versions from a version registry: each query is an indexed lookup instead of a scan of the
+    refs of a repository. The registry does not know the ancestry of commits: all versions of the package are
+    considered unless a repository is provided, in which case this provider only considers the versions produced from
+    commits visible from the commit provided.
+    """
+
+    def __init__(self, registry: VersionRegistry, package: str, commit_sha: str, *, repo: Optional[Repo] = None):
+        self._registry = registry
+        self._package = package
+        self._current_versions = registry.get_versions(package, commit_sha)
+        self._visible_versions: Optional[VersionIndex] = None
+        if repo is not None:
+            commits = registry.get_commits(package)
+            visible_commits = get_visible_commits(repo, commit_sha, commits.values())
+            self._visible_versions = VersionIndex(
+                Version.parse(version) for version, version_commit_sha in commits.items()
+                if version_commit_sha in visible_commits
+            )
+
+    def get_current_version(self) -> Optional[Version]:
+        return max(self._current_versions) if self._current_versions else None
+
+    def get_latest_version(self, in_stage: Optional[Stage] = None) -> Optional[Version]:
+        if self._visible_versions is not None:
+            return self._visible_versions.get_latest_version(in_stage)
+        return self._registry.get_latest_version(self._package, in_stage)
+
+    def get_latest_version_in_line(self, major: int, minor: int, in_stage: Optional[Stage] = None) -> Optional[Version]:
+        if self._visible_versions is not None:
+            return self._visible_versions.get_latest_version_in_line(major, minor, in_stage)
+        return self._registry.get_latest_version(self._package, in_stage, line=(major, minor))
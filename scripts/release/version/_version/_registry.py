@@ -0,0 +1,139 @@
+"""
+A registry of the versions of packages stored in a SQLite database. Versions are indexed per package, commit and stage
+so that the current and latest versions of a package are single indexed lookups.
+"""
+from pathlib import Path
+import sqlite3
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from poetry.core.semver import Version
+
+from ._stages import get_stage, Stage
+
+__all__ = ["VersionRecord", "VersionRegistry"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS versions (
+    package TEXT NOT NULL,
+    version TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    commit_sha TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    major INTEGER NOT NULL,
+    minor INTEGER NOT NULL,
+    patch INTEGER NOT NULL,
+    stage_rank INTEGER NOT NULL,
+    stage_number INTEGER NOT NULL,
+    PRIMARY KEY (package, version)
+);
+CREATE INDEX IF NOT EXISTS versions_by_order
+    ON versions (package, major, minor, patch, stage_rank, stage_number, version);
+CREATE INDEX IF NOT EXISTS versions_by_stage
+    ON versions (package, stage, major, minor, patch, stage_rank, stage_number, version);
+CREATE INDEX IF NOT EXISTS versions_by_commit ON versions (package, commit_sha);
+"""
+# orders versions of the same patch as Version does: alpha < rc1 < rc2 < release < post1 < post2
+_ORDER_BY = "major DESC, minor DESC, patch DESC, stage_rank DESC, stage_number DESC, version DESC"
+
+
+class VersionRecord(NamedTuple):
+    package: str
+    version: Version
+    commit_sha: str
+    timestamp: int
+
+    @property
+    def stage(self) -> Stage:
+        return get_stage(self.version)
+
+
+class VersionRegistry:
+    """
+    Reads and writes the versions of packages in a SQLite database, created if it does not exist.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._connection = sqlite3.connect(str(path))
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "VersionRegistry":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def add_records(self, records: Iterable[VersionRecord]) -> None:
+        """
+        Adds the records provided, replacing the records of the same package and version.
+        """
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO versions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (_to_row(record) for record in records),
+            )
+
+    def get_commits(self, package: str) -> Dict[str, str]:
+        """
+        Maps the text of each version of the package to the sha of the commit it was produced from.
+        """
+        rows = self._connection.execute("SELECT version, commit_sha FROM versions WHERE package = ?", (package,))
+        return dict(rows)
+
+    def get_versions(self, package: str, commit_sha: str) -> List[Version]:
+        """
+        Returns the versions of the package produced from the commit provided.
+        """
+        rows = self._connection.execute(
+            "SELECT version FROM versions WHERE package = ? AND commit_sha = ?", (package, commit_sha)
+        )
+        return [Version.parse(version) for version, in rows]
+
+    def get_latest_version(
+        self, package: str, in_stage: Optional[Stage] = None, *, line: Optional[Tuple[int, int]] = None
+    ) -> Optional[Version]:
+        """
+        Returns the latest version of the package, in the stage and the release line major.minor provided if any.
+        """
+        conditions: List[str] = ["package = ?"]
+        parameters: List[object] = [package]
+        if in_stage:
+            conditions.append("stage = ?")
+            parameters.append(in_stage.value)
+        if line:
+            conditions.append("major = ? AND minor = ?")
+            parameters.extend(line)
+        row = self._connection.execute(
+            f"SELECT version FROM versions WHERE {' AND '.join(conditions)} ORDER BY {_ORDER_BY} LIMIT 1", parameters
+        ).fetchone()
+        return Version.parse(row[0]) if row else None
+
+
+def _to_row(record: VersionRecord) -> Tuple[object, ...]:
+    version, stage = record.version, record.stage
+    if stage is Stage.RELEASE_CANDIDATE:
+        stage_number = int(version.prerelease[1])
+    elif stage is Stage.POST:
+        stage_number = int(version.build[0])
+    else:
+        stage_number = 0
+    return (
+        record.package,
+        version.text,
+        stage.value,
+        record.commit_sha,
+        record.timestamp,
+        version.major,
+        version.minor,
+        version.patch,
+        stage.__index__(),
+        stage_number,
+    )
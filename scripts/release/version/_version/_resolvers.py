@@ -1,13 +1,15 @@
 from abc import ABC, abstractmethod
 from collections import namedtuple
+from enum import Enum
 import re
-from typing import ClassVar, Collection, Optional
+from typing import AbstractSet, Any, ClassVar, Collection, Iterable, Mapping, Optional, Sequence, Tuple, Union
 
 from git import Repo
 from poetry.core.semver import Version
 
-from ._config import FEATURE, DEVELOP, RELEASE, MASTER, HOTFIX, DETACHED_HEAD
+from ._config import FEATURE, DEVELOP, RELEASE, MASTER, HOTFIX, SUPPORT, DETACHED_HEAD
 from ._providers import IVersionProvider
+from ._snapshot import get_branches
 from ._stages import get_stage, to_next_stage, Stage
 
 
@@ -18,6 +20,17 @@ v0_0_0 = Version(0, 0, 0)
 StageInfo = namedtuple("StageInfo", ("branch", "is_full_name", "stage"))
 
 
+class NotProvided(Enum):
+    """
+    Marks an optional argument that was not provided when None is a meaningful value.
+    """
+
+    NOT_PROVIDED = "not-provided"
+
+
+NOT_PROVIDED = NotProvided.NOT_PROVIDED
+
+
 class VersionResolutionError(ValueError):
     pass
 
@@ -46,21 +59,78 @@ class BranchBasedVersionResolver(IVersionResolver, ABC):
 
     branch_to_stage: ClassVar[Collection[StageInfo]] = []
     disallow_special_branch_names_without_stage: ClassVar[bool] = True
-
-    def __init__(self, version_provider: IVersionProvider, repo: Repo):
+    special_branches: ClassVar[AbstractSet[str]] = SPECIAL_BRANCHES
+    # stages in decreasing priority to choose the branch a detached head is resolved as
+    detached_head_stage_priority: ClassVar[Sequence[Stage]] = (
+        Stage.RELEASE, Stage.POST, Stage.RELEASE_CANDIDATE, Stage.ALPHA
+    )
+    # maps the root of a branch name to its stage info, built from branch_to_stage when the class is defined
+    _stage_table: ClassVar[Mapping[str, StageInfo]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any):
+        super().__init_subclass__(**kwargs)
+        cls._stage_table = {stage_info.branch: stage_info for stage_info in reversed(list(cls.branch_to_stage))}
+
+    def __init__(
+        self,
+        version_provider: IVersionProvider,
+        repo: Repo,
+        *,
+        branch: Optional[str] = None,
+        commit_sha: Optional[str] = None,
+    ):
+        """
+        The version is resolved for the head of the repository unless a branch and the sha of its head commit are
+        provided.
+        """
         super().__init__(version_provider)
-        self._commit_sha = repo.head.commit.hexsha
-        self._branch = self.get_branch_name(repo)
+        self._commit_sha = commit_sha or repo.head.commit.hexsha
+        self._branch = branch or self.get_branch_name(repo)
         self._stage = self.get_stage_from_branch(self._branch)
 
     @classmethod
     def get_branch_name(cls, repo: Repo) -> str:
-        return DETACHED_HEAD if repo.head.is_detached else repo.head.ref.name
+        if repo.head.is_detached:
+            return cls.get_detached_head_branch_name(repo) or DETACHED_HEAD
+        return repo.head.ref.name
+
+    @classmethod
+    def get_detached_head_branch_name(cls, repo: Repo) -> Optional[str]:
+        """
+        Returns the branch a detached head is resolved as: among the local and remote-tracking branches whose head is
+        the head commit, listed in a single git call, the branch with the stage of highest priority. Branches the head
+        commit was only merged into are not considered: an old commit of a development branch would otherwise resolve
+        as a release once merged. Returns None if no branch with a stage points at the head commit.
+        """
+        commit_sha = repo.head.commit.hexsha
+        return cls.get_branch_name_of_commit(get_branches(repo, include_remotes=True, points_at=commit_sha), commit_sha)
+
+    @classmethod
+    def get_branch_name_of_commit(cls, branches: Mapping[str, str], commit_sha: str) -> Optional[str]:
+        """
+        Returns the branch a commit is resolved as among the branches provided, mapped to the sha of their head commit:
+        only the branches whose head is the commit are considered. See get_detached_head_branch_name.
+        """
+        candidates = [branch for branch, branch_sha in branches.items() if branch_sha == commit_sha]
+
+        branch_priorities = []
+        for branch in candidates:
+            try:
+                stage = cls.get_stage_from_branch(branch)
+            except VersionResolutionError:
+                continue
+            if stage in cls.detached_head_stage_priority:
+                branch_priorities.append((cls.detached_head_stage_priority.index(stage), branch))
+        return min(branch_priorities)[1] if branch_priorities else None
+
+    @classmethod
+    def get_stage_info(cls, branch: str) -> Optional[StageInfo]:
+        return cls._stage_table.get(branch.split("/")[0])
 
     @classmethod
     def get_stage_from_branch(cls, branch: str) -> Optional[Stage]:
         branch_root = branch.split("/")[0]
-        stage_info = next((stage_info for stage_info in cls.branch_to_stage if stage_info.branch == branch_root), None)
+        stage_info = cls.get_stage_info(branch)
 
         if stage_info:
             if stage_info.is_full_name and branch != stage_info.branch:
@@ -70,10 +140,10 @@ class BranchBasedVersionResolver(IVersionResolver, ABC):
                 )
             return stage_info.stage
 
-        if cls.disallow_special_branch_names_without_stage and branch_root in SPECIAL_BRANCHES:
+        if cls.disallow_special_branch_names_without_stage and branch_root in cls.special_branches:
             raise VersionResolutionError(
                 f"{branch_root} has a special meaning but is not part of your release logic. This is not allowed. "
-                f"Special branches: {SPECIAL_BRANCHES}."
+                f"Special branches: {set(cls.special_branches)}."
             )
 
         return None
@@ -141,6 +211,9 @@ class GitFlowReleaseVersionResolver(BranchBasedVersionResolver):
     Once the package is ready to be released, the {RELEASE} branch is merged with the {MASTER} branch.
     Any bug found in the software released is committed directly on the {MASTER} branch or on a {HOTFIX} branch
     created from the {MASTER} branch which is merged back to {MASTER} once the bug is fixed.
+    Older release lines are maintained on {SUPPORT} branches following the pattern defined by the attribute
+    support_branch_pattern: each commit on a {SUPPORT} branch is a release of the next patch of its line. Support
+    branches are the branches of a release stage that is not a full branch name.
     """
 
     branch_to_stage: ClassVar[Collection[StageInfo]] = [
@@ -149,22 +222,42 @@ class GitFlowReleaseVersionResolver(BranchBasedVersionResolver):
         StageInfo(RELEASE, False, Stage.RELEASE_CANDIDATE),
         StageInfo(MASTER, True, Stage.RELEASE),
         StageInfo(HOTFIX, False, Stage.POST),
+        StageInfo(SUPPORT, False, Stage.RELEASE),
     ]
     release_branch_pattern: ClassVar[re.Pattern] = re.compile(r"^({rel}/v(?P<version>\d.\d))$".format(rel=RELEASE))
-
-    def __init__(self, version_provider: IVersionProvider, repo: Repo):
-        super().__init__(version_provider, repo)
-        self._release_candidate_version = self.get_latest_candidate_version(repo)
+    support_branch_pattern: ClassVar[re.Pattern] = re.compile(
+        r"^({sup}/v?(?P<major>\d+)\.(?P<minor>\d+))$".format(sup=SUPPORT)
+    )
+    special_branches: ClassVar[AbstractSet[str]] = {*SPECIAL_BRANCHES, SUPPORT}
+
+    def __init__(
+        self,
+        version_provider: IVersionProvider,
+        repo: Repo,
+        *,
+        release_candidate_version: Union[Version, None, NotProvided] = NOT_PROVIDED,
+        **kwargs: Optional[str],
+    ):
+        """
+        The latest release candidate version is derived from the release branches of the repository unless it is
+        provided. None means that there is no release branch.
+        """
+        super().__init__(version_provider, repo, **kwargs)
+        if isinstance(release_candidate_version, NotProvided):
+            release_candidate_version = self.get_latest_candidate_version(repo)
+        self._release_candidate_version = release_candidate_version
 
     @classmethod
     def get_latest_candidate_version(cls, repo: Repo) -> Optional[Version]:
+        return cls.get_latest_candidate_version_from_branches(branch.name for branch in repo.heads)
+
+    @classmethod
+    def get_latest_candidate_version_from_branches(cls, branches: Iterable[str]) -> Optional[Version]:
         max_version = None
-        for branch in repo.heads:
-            version = cls.get_version(branch.name)
-            if version is not None and max_version is not None:
-                max_version = max(max_version, version)
-            else:
-                max_version = version
+        for branch in branches:
+            version = cls.get_version(branch)
+            if version is not None:
+                max_version = max(max_version, version) if max_version is not None else version
         return max_version
 
     @classmethod
@@ -175,6 +268,18 @@ class GitFlowReleaseVersionResolver(BranchBasedVersionResolver):
             return version
         return None
 
+    @classmethod
+    def is_support_branch(cls, branch: str) -> bool:
+        stage_info = cls.get_stage_info(branch)
+        return stage_info is not None and stage_info.stage is Stage.RELEASE and not stage_info.is_full_name
+
+    @classmethod
+    def get_support_line(cls, branch: str) -> Optional[Tuple[int, int]]:
+        match = cls.support_branch_pattern.match(branch)
+        if match:
+            return int(match.group("major")), int(match.group("minor"))
+        return None
+
     def resolve_version(self) -> Optional[Version]:
         base_version = super().resolve_version()
         if base_version:
@@ -226,7 +331,10 @@ class GitFlowReleaseVersionResolver(BranchBasedVersionResolver):
             Stage.POST: (Stage.POST, Stage.RELEASE),
         }
         if self.stage in release_stages:
-            latest_version = self._provider.get_latest_version()
+            if self.is_support_branch(self.branch):
+                latest_version = self._get_latest_support_version()
+            else:
+                latest_version = self._provider.get_latest_version()
             if latest_version is None:
                 if self.stage is Stage.RELEASE:
                     return v0_0_0
@@ -244,3 +352,18 @@ class GitFlowReleaseVersionResolver(BranchBasedVersionResolver):
             )
 
         raise NotImplementedError(f"Version resolution was not implemented for stage: {self.stage.name}.")
+
+    def _get_latest_support_version(self) -> Version:
+        line = self.get_support_line(self.branch)
+        if line is None:
+            raise VersionResolutionError(
+                f"The support branch you created has the wrong format: {self.branch}. The regex pattern for a support "
+                f"branch is {self.support_branch_pattern.pattern}."
+            )
+        latest_version = self._provider.get_latest_version_in_line(*line)
+        if latest_version is None:
+            raise VersionResolutionError(
+                f"The support branch: {self.branch} maintains the release line {line[0]}.{line[1]} which was never "
+                f"released."
+            )
+        return latest_version
@@ -0,0 +1,271 @@
+"""
+A snapshot of the refs of a repository: version tags, branches and which tagged commits are visible from each branch.
+It is read with a handful of git commands and can then be queried for many commits without touching the repository.
+"""
+from typing import (
+    AbstractSet, Dict, FrozenSet, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+)
+
+from git import Repo
+from poetry.core.semver import Version
+
+from ._tags import from_tag
+
+__all__ = [
+    "HeadRefSnapshot",
+    "RefSnapshot",
+    "VersionTag",
+    "get_version_tags",
+    "get_branches",
+    "get_visible_commits",
+    "iter_version_tags",
+    "read_ref_listing",
+]
+
+_EMPTY: FrozenSet[str] = frozenset()
+_TAG_LISTING_FORMAT = "%(refname:strip=2) %(objectname) %(*objectname)"
+_TAGS_PREFIX, _HEADS_PREFIX, _REMOTES_PREFIX, _PEELED_SUFFIX = "refs/tags/", "refs/heads/", "refs/remotes/", "^{}"
+
+
+class VersionTag(NamedTuple):
+    name: str
+    commit_sha: str
+    version: Version
+
+
+def get_version_tags(repo: Repo) -> List[VersionTag]:
+    """
+    Lists the version tags of the repository with the commit they point to, peeling annotated tags, in one git call.
+    """
+    listing = repo.git.for_each_ref("refs/tags", format=_TAG_LISTING_FORMAT)
+    return list(_parse_tag_listing(listing.splitlines()))
+
+
+def iter_version_tags(repo: Repo, *, merged: Optional[str] = None) -> Iterator[VersionTag]:
+    """
+    Streams the version tags of the repository with the commit they point to, peeling annotated tags, from one git call
+    whose output is parsed line by line instead of being read in memory. If a commit is provided, only the tags of
+    commits merged into this commit are listed.
+    """
+    options = {"merged": merged} if merged else {}
+    process = repo.git.for_each_ref("refs/tags", format=_TAG_LISTING_FORMAT, as_process=True, **options)
+    yield from _parse_tag_listing(line.decode() for line in process.stdout)
+    process.wait()
+
+
+def get_branches(repo: Repo, *, include_remotes: bool = False, points_at: Optional[str] = None) -> Dict[str, str]:
+    """
+    Maps the name of each branch of the repository to the sha of its head commit, in one git call. Remote-tracking
+    branches are named without their remote so that they resolve to the same stage as local branches. Local branches
+    take precedence over remote-tracking branches with the same name.
+    If a commit is provided, only the branches whose head is this commit are listed.
+    """
+    patterns = ["refs/heads", "refs/remotes"] if include_remotes else ["refs/heads"]
+    options = {"points_at": points_at} if points_at else {}
+    listing = repo.git.for_each_ref(*patterns, format="%(refname) %(objectname)", **options)
+    branches: Dict[str, str] = {}
+    for line in listing.splitlines():
+        ref_name, commit_sha = line.split(" ")
+        _add_branch(branches, ref_name, commit_sha)
+    return branches
+
+
+def get_visible_commits(repo: Repo, commit_sha: str, commits: Iterable[str]) -> FrozenSet[str]:
+    """
+    Returns the commits provided that are reachable from the commit commit_sha, in one git call.
+    """
+    return _get_visible_commits(repo, [commit_sha], set(commits))[commit_sha]
+
+
+def read_ref_listing(lines: Iterable[str]) -> Tuple[Optional[str], "RefSnapshot"]:
+    """
+    Reads a listing of refs in the format of git ls-remote or git show-ref, one sha and ref name per line, without a
+    repository. Returns the sha of HEAD if it is listed and a snapshot of the version tags and branches listed.
+    Annotated tags point to the commit of their peeled line (ending with ^{}), which git ls-remote lists and git
+    show-ref lists with -d. The ancestry of commits is not listed: the snapshot has no visibility.
+    """
+    head_sha = None
+    tags: Dict[str, VersionTag] = {}
+    branches: Dict[str, str] = {}
+    for line in lines:
+        fields = line.split()
+        if len(fields) != 2:
+            continue
+        object_sha, ref_name = fields
+        if ref_name.startswith(_TAGS_PREFIX):
+            name = ref_name[len(_TAGS_PREFIX):]
+            if name.endswith(_PEELED_SUFFIX):
+                tag = tags.get(name[:-len(_PEELED_SUFFIX)])
+                if tag:
+                    tags[tag.name] = tag._replace(commit_sha=object_sha)
+            else:
+                version = from_tag(name)
+                if version:
+                    tags[name] = VersionTag(name, object_sha, version)
+        elif ref_name == "HEAD":
+            head_sha = object_sha
+        else:
+            _add_branch(branches, ref_name, object_sha)
+    return head_sha, RefSnapshot(list(tags.values()), branches)
+
+
+def _add_branch(branches: Dict[str, str], ref_name: str, commit_sha: str) -> None:
+    if ref_name.startswith(_HEADS_PREFIX):
+        branches[ref_name[len(_HEADS_PREFIX):]] = commit_sha
+    elif ref_name.startswith(_REMOTES_PREFIX):
+        remote_branch = ref_name[len(_REMOTES_PREFIX):].split("/", 1)
+        if len(remote_branch) == 2 and remote_branch[1] != "HEAD":
+            branches.setdefault(remote_branch[1], commit_sha)
+
+
+def _parse_tag_listing(lines: Iterable[str]) -> Iterable[VersionTag]:
+    for line in lines:
+        name, object_sha, *peeled_sha = line.split()
+        version = from_tag(name)
+        if version:
+            yield VersionTag(name, peeled_sha[0] if peeled_sha else object_sha, version)
+
+
+class RefSnapshot:
+    """
+    Version tags and branches of a repository fixed at instantiation. Visibility of tagged commits is computed once
+    for all the commits of interest with a single walk of the commit graph, so that querying it for many branches does
+    not cost more git calls.
+    """
+
+    def __init__(
+        self,
+        tags: Sequence[VersionTag],
+        branches: Mapping[str, str],
+        visible_commits: Optional[Mapping[str, FrozenSet[str]]] = None,
+    ):
+        self._tags = tuple(tags)
+        self._branches = dict(branches)
+        self._visible_commits = dict(visible_commits or {})
+
+    @classmethod
+    def from_repo(cls, repo: Repo, *, commits: Iterable[str] = (), include_remotes: bool = False) -> "RefSnapshot":
+        """
+        Takes a snapshot of the repository. The visibility of tagged commits is computed for the head of every branch
+        and for the additional commits provided.
+        """
+        tags = get_version_tags(repo)
+        branches = get_branches(repo, include_remotes=include_remotes)
+        tips = set(branches.values()).union(commits)
+        return cls(tags, branches, _get_visible_commits(repo, tips, {tag.commit_sha for tag in tags}))
+
+    @property
+    def tags(self) -> Sequence[VersionTag]:
+        return self._tags
+
+    @property
+    def branches(self) -> Mapping[str, str]:
+        return self._branches
+
+    @property
+    def visible_commits(self) -> Mapping[str, FrozenSet[str]]:
+        return self._visible_commits
+
+    def get_versions(self, commit_sha: Optional[str] = None, *, visible: bool = False) -> List[Version]:
+        """
+        Returns the versions tagged on the commit provided, or on any commit if no commit is provided. If visible is
+        set, returns the versions tagged on commits visible from the commit provided instead.
+        """
+        if commit_sha is None:
+            return [tag.version for tag in self._tags]
+        if visible:
+            if commit_sha not in self._visible_commits:
+                raise KeyError(f"Visibility was not computed for commit: {commit_sha} when taking the snapshot.")
+            visible_commits = self._visible_commits[commit_sha]
+            return [tag.version for tag in self._tags if tag.commit_sha in visible_commits]
+        return [tag.version for tag in self._tags if tag.commit_sha == commit_sha]
+
+
+def _get_visible_commits(
+    repo: Repo, tips: Iterable[str], tagged_commits: AbstractSet[str]
+) -> Dict[str, FrozenSet[str]]:
+    """
+    Returns the tagged commits reachable from each tip. Commits are listed parents first and each commit only keeps
+    its nearest tagged ancestors, which it shares with its parent unless it is tagged or a merge. Each tagged commit
+    also keeps the nearest tagged ancestors of its parents. The tagged commits reachable from a tip are then collected
+    by walking this much smaller graph of tagged commits, which keeps memory linear in the number of commits.
+    """
+    tips = set(tips)
+    if not tips or not tagged_commits:
+        return {tip: _EMPTY for tip in tips}
+
+    nearest_tagged: Dict[str, FrozenSet[str]] = {}
+    tagged_parents: Dict[str, FrozenSet[str]] = {}
+    for line in repo.git.rev_list(*tips, topo_order=True, reverse=True, parents=True).splitlines():
+        commit_sha, *parent_shas = line.split()
+        parent_sets = [nearest_tagged.get(parent_sha, _EMPTY) for parent_sha in parent_shas]
+        if len(parent_sets) == 1:
+            inherited = parent_sets[0]
+        else:
+            inherited = frozenset().union(*parent_sets) if parent_sets else _EMPTY
+        if commit_sha in tagged_commits:
+            tagged_parents[commit_sha] = inherited
+            nearest_tagged[commit_sha] = frozenset((commit_sha,))
+        else:
+            nearest_tagged[commit_sha] = inherited
+
+    visible_commits = {}
+    for tip in tips:
+        visible = set()
+        to_visit = list(nearest_tagged.get(tip, _EMPTY))
+        while to_visit:
+            commit_sha = to_visit.pop()
+            if commit_sha not in visible:
+                visible.add(commit_sha)
+                to_visit.extend(tagged_parents[commit_sha])
+        visible_commits[tip] = frozenset(visible)
+    return visible_commits
+
+
+class HeadRefSnapshot:
+    """
+    Keeps a snapshot of the refs of a repository current for its HEAD commit. Each refresh lists the refs again but only
+    parses the tags that changed since the previous refresh. The visibility of tagged commits is recomputed when HEAD
+    moves and otherwise only checked for the tags that changed.
+    """
+
+    def __init__(self, repo: Repo):
+        self._repo = repo
+        self._tags: Dict[str, Tuple[str, Optional[VersionTag]]] = {}
+        self._head_sha: Optional[str] = None
+        self._visible_commits: Set[str] = set()
+
+    def refresh(self) -> Tuple[str, RefSnapshot]:
+        """
+        Returns the sha of the HEAD commit and a snapshot of the refs of the repository.
+        """
+        head_sha = self._repo.head.commit.hexsha
+
+        tags: Dict[str, Tuple[str, Optional[VersionTag]]] = {}
+        changed_tags = []
+        for line in self._repo.git.for_each_ref("refs/tags", format=_TAG_LISTING_FORMAT).splitlines():
+            name = line.split(" ", 1)[0]
+            previous = self._tags.get(name)
+            if previous and previous[0] == line:
+                tags[name] = previous
+            else:
+                tag = next(iter(_parse_tag_listing([line])), None)
+                tags[name] = (line, tag)
+                if tag:
+                    changed_tags.append(tag.name)
+        self._tags = tags
+
+        if head_sha != self._head_sha:
+            self._visible_commits = self._get_merged_commits(head_sha)
+        elif changed_tags:
+            self._visible_commits.update(self._get_merged_commits(head_sha, changed_tags))
+        self._head_sha = head_sha
+
+        version_tags = [tag for _, tag in tags.values() if tag]
+        visible_commits = frozenset(self._visible_commits)
+        return head_sha, RefSnapshot(version_tags, get_branches(self._repo), {head_sha: visible_commits})
+
+    def _get_merged_commits(self, head_sha: str, tag_names: Sequence[str] = ()) -> Set[str]:
+        patterns = [f"refs/tags/{name}" for name in tag_names] or ["refs/tags"]
+        listing = self._repo.git.for_each_ref(*patterns, merged=head_sha, format="%(objectname) %(*objectname)")
+        return {line.split()[-1] for line in listing.splitlines()}
@@ -0,0 +1,130 @@
+"""
+Detection of changes to the refs of a repository: HEAD, packed-refs and the files under refs/.
+inotify is used when the optional inotify_simple package is installed, otherwise the files are polled.
+"""
+from abc import ABC, abstractmethod
+import os
+from pathlib import Path
+import time
+from typing import Dict, Optional, Tuple
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # pragma: no cover - depends on the environment
+    INotify = None
+
+__all__ = ["IRefWatcher", "InotifyRefWatcher", "PollingRefWatcher", "get_ref_watcher"]
+
+WATCHED_FILES = ("HEAD", "packed-refs")
+REFS_DIR = "refs"
+LOCK_SUFFIX = ".lock"
+
+
+class IRefWatcher(ABC):
+    """
+    Blocks until the refs of a repository change.
+    """
+
+    def __init__(self, git_dir: Path):
+        self._git_dir = Path(git_dir)
+
+    @abstractmethod
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for the refs of the repository to change. Returns False if they did not change within the timeout.
+        """
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        pass
+
+
+class PollingRefWatcher(IRefWatcher):
+    """
+    Polls the modification time, size and inode of the ref files. git writes refs to a lock file which is renamed to
+    the ref file so a change always shows up in one of these.
+    """
+
+    def __init__(self, git_dir: Path, interval: float = 1.0):
+        super().__init__(git_dir)
+        self._interval = interval
+        self._signature = self._get_signature()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            signature = self._get_signature()
+            if signature != self._signature:
+                self._signature = signature
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            remaining = self._interval if deadline is None else max(deadline - time.monotonic(), 0)
+            time.sleep(min(self._interval, remaining))
+
+    def _get_signature(self) -> Dict[str, Tuple[int, int, int]]:
+        paths = [self._git_dir / file_name for file_name in WATCHED_FILES]
+        for directory, _, file_names in os.walk(self._git_dir / REFS_DIR):
+            paths.extend(Path(directory) / file_name for file_name in file_names if not file_name.endswith(LOCK_SUFFIX))
+
+        signature = {}
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            signature[str(path)] = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        return signature
+
+
+class InotifyRefWatcher(IRefWatcher):
+    """
+    Watches the git directory and every directory under refs/ with inotify. Directories are watched rather than files
+    because git replaces ref files by renaming lock files onto them.
+    """
+
+    MASK = 0 if INotify is None else (
+        flags.CREATE | flags.DELETE | flags.MODIFY | flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM
+    )
+
+    def __init__(self, git_dir: Path):
+        if INotify is None:
+            raise RuntimeError("inotify_simple must be installed to watch refs with inotify.")
+        super().__init__(git_dir)
+        self._inotify = INotify()
+        self._git_dir_descriptor = self._inotify.add_watch(str(self._git_dir), self.MASK)
+        self._ref_dirs: Dict[int, Path] = {}
+        for directory, _, _ in os.walk(self._git_dir / REFS_DIR):
+            self._add_ref_dir(Path(directory))
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            events = self._inotify.read(timeout=None if remaining is None else int(remaining * 1000))
+            if not events:
+                return False
+            if any([self._is_ref_change(event) for event in events]):
+                return True
+
+    def close(self) -> None:
+        self._inotify.close()
+
+    def _add_ref_dir(self, directory: Path) -> None:
+        self._ref_dirs[self._inotify.add_watch(str(directory), self.MASK | flags.ONLYDIR)] = directory
+
+    def _is_ref_change(self, event) -> bool:
+        if event.name.endswith(LOCK_SUFFIX):
+            return False
+        if event.wd == self._git_dir_descriptor:
+            return event.name in WATCHED_FILES
+        if event.mask & flags.ISDIR and event.mask & flags.CREATE:
+            # refs may have been written to the new directory before it was watched
+            self._add_ref_dir(self._ref_dirs[event.wd] / event.name)
+        return event.wd in self._ref_dirs
+
+
+def get_ref_watcher(git_dir: Path, *, poll_interval: float = 1.0, use_inotify: bool = True) -> IRefWatcher:
+    if use_inotify and INotify is not None:
+        return InotifyRefWatcher(git_dir)
+    return PollingRefWatcher(git_dir, poll_interval)
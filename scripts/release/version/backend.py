@@ -0,0 +1,53 @@
+"""
+PEP 517 build backend building the project with poetry-core and the version of the current commit. The version is
+injected in memory while building: neither pyproject.toml nor the version file of the project is rewritten.
+The version can be forced with the config setting: version. Without a version, or outside a git checkout (f.ex. a git
+archive export or an sdist), the declared version is used.
+"""
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+from git import InvalidGitRepositoryError, NoSuchPathError, Repo
+from poetry.core.semver import Version
+from poetry.core.toml import TOMLFile
+
+from ._version import build_package, get_version
+
+__all__ = ["build_sdist", "build_wheel"]
+
+logger = getLogger(__name__)
+
+
+def build_wheel(
+    wheel_directory: str, config_settings: Optional[Mapping[str, Any]] = None, metadata_directory: Optional[str] = None
+) -> str:
+    return _build(Path(wheel_directory), "wheel", config_settings).name
+
+
+def build_sdist(sdist_directory: str, config_settings: Optional[Mapping[str, Any]] = None) -> str:
+    return _build(Path(sdist_directory), "sdist", config_settings).name
+
+
+def _build(dist_dir: Path, build_format: str, config_settings: Optional[Mapping[str, Any]]) -> Path:
+    project_dir = Path.cwd()
+    version = _get_version(project_dir, config_settings or {})
+    return build_package(version, dist_dir, project_dir=project_dir, formats=[build_format])[0]
+
+
+def _get_version(project_dir: Path, config_settings: Mapping[str, Any]) -> Version:
+    if config_settings.get("version"):
+        return Version.parse(config_settings["version"])
+
+    declared_version = Version.parse(str(TOMLFile(project_dir / "pyproject.toml").read()["tool"]["poetry"]["version"]))
+    try:
+        with Repo(project_dir, search_parent_directories=True) as repo:
+            current_version = get_version(repo, include_alpha=True)
+    except (InvalidGitRepositoryError, NoSuchPathError):
+        logger.warning("The project is not in a git checkout. Building the declared version: %s", declared_version.text)
+        return declared_version
+    if current_version:
+        return current_version
+
+    logger.warning("The current commit is not versioned. Building the declared version: %s", declared_version.text)
+    return declared_version
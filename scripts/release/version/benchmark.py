@@ -0,0 +1,120 @@
+"""
+Benchmark of the time and the peak memory the version providers take to resolve the version of a repository with many
+tags, f.ex.: python -m version.benchmark --tags 100000. Each provider resolves the version in its own interpreter so
+that the peak resident set size (RSS) of each one is measured on its own.
+"""
+from argparse import ArgumentParser
+import json
+from pathlib import Path
+import random
+import resource
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+import time
+from typing import Callable, Dict, List, Mapping
+
+from git import Repo
+
+from ._version._providers import (
+    IVersionProvider,
+    VersionProviderFromSnapshot,
+    VersionProviderFromTags,
+    VersionProviderFromTagStream,
+)
+from ._version._resolvers import ContinuousDeploymentVersionResolver
+from ._version._snapshot import get_version_tags, RefSnapshot
+
+__all__ = ["create_repo", "measure_provider", "PROVIDERS"]
+
+PROVIDERS: Mapping[str, Callable[[Repo], IVersionProvider]] = {
+    # looks up the commit of each tag on its own: slow beyond a few thousand tags
+    "tags": VersionProviderFromTags,
+    "snapshot": lambda repo: VersionProviderFromSnapshot(
+        RefSnapshot(get_version_tags(repo), {}), repo.head.commit.hexsha
+    ),
+    "stream": VersionProviderFromTagStream,
+}
+N_COMMITS = 10
+N_RELEASES = 50
+
+
+def create_repo(path: Path, n_tags: int, *, seed: int = 0) -> Repo:
+    """
+    Creates a repository whose commits are tagged with releases and, for the most part, alpha versions. Tags are
+    written in the packed-refs file directly so that creating many of them is fast.
+    """
+    repo = Repo.init(path)
+    repo.git.symbolic_ref("HEAD", "refs/heads/master")
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "ci-with-poetry")
+        config.set_value("user", "email", "ci-with-poetry@example.com")
+    commit_shas = [repo.index.commit(f"commit {i}").hexsha for i in range(N_COMMITS)]
+
+    # tags are written as they are generated so that the memory of this interpreter, which the interpreters measured
+    # are started from, does not grow with the number of tags
+    randomizer = random.Random(seed)
+    with (Path(repo.git_dir) / "packed-refs").open("w") as packed_refs:
+        packed_refs.write("# pack-refs with: peeled fully-peeled \n")
+        for i in range(n_tags):
+            if i < N_RELEASES:
+                version = f"{i // 100 % 10}.{i // 10 % 10}.{i % 10}"
+            else:
+                version = f"{randomizer.randrange(10)}.{randomizer.randrange(10)}.0-alpha+{i:08x}"
+            packed_refs.write(f"{randomizer.choice(commit_shas)} refs/tags/v{version}\n")
+    return repo
+
+
+def measure_provider(repo_path: Path, provider_name: str) -> Dict[str, float]:
+    """
+    Resolves the continuous deployment version of the repository with the provider named. Returns the seconds it took
+    and the peak RSS of the interpreter in bytes.
+    """
+    with Repo(repo_path) as repo:
+        start = time.perf_counter()
+        if provider_name in PROVIDERS:
+            provider = PROVIDERS[provider_name](repo)
+            ContinuousDeploymentVersionResolver(provider, repo).resolve_version()
+        seconds = time.perf_counter() - start
+    # the maximum resident set size is in kilobytes on linux
+    return {"seconds": seconds, "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024}
+
+
+def _run(n_tags_per_run: List[int], provider_names: List[str]) -> None:
+    print(f"{'tags':>8} {'provider':<8} {'seconds':>8} {'peak RSS':>10}")
+    for n_tags in n_tags_per_run:
+        with TemporaryDirectory() as repo_dir:
+            create_repo(Path(repo_dir), n_tags).close()
+            # the imports only measure the interpreter and the modules: the baseline of the providers
+            for provider_name in ["imports", *provider_names]:
+                output = subprocess.run(
+                    [sys.executable, "-m", "version.benchmark", "--measure", provider_name, "--repo", repo_dir],
+                    cwd=Path(__file__).parent.parent,
+                    check=True,
+                    stdout=subprocess.PIPE,
+                    universal_newlines=True,
+                ).stdout
+                measure = json.loads(output)
+                print(
+                    f"{n_tags:>8} {provider_name:<8} {measure['seconds']:>8.2f} {measure['peak_rss'] / 1e6:>8.1f}MB",
+                    flush=True,
+                )
+
+
+cli_parser = ArgumentParser(usage="Measures the time and the peak RSS of the version providers.")
+cli_parser.add_argument(
+    "--tags", help="The numbers of tags of the repositories.", type=int, nargs="+", default=[1000, 10000, 100000],
+)
+cli_parser.add_argument(
+    "--providers", help="The providers measured.", choices=list(PROVIDERS), nargs="+", default=["snapshot", "stream"],
+)
+cli_parser.add_argument("--measure", help="Measures the provider named in the current interpreter.", default=None)
+cli_parser.add_argument("--repo", help="The repository measured.", type=Path, default=None)
+
+
+if __name__ == "__main__":
+    args = cli_parser.parse_args()
+    if args.measure:
+        print(json.dumps(measure_provider(args.repo, args.measure)))
+    else:
+        _run(args.tags, args.providers)
@@ -0,0 +1,9 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+# navigate to the current directory
+cd "$(dirname "$0")"
+
+# package the version tool into a single zipapp: CI runners can then run it without installing its requirements
+echo build version zipapp
+"${PYTHON:=python}" -m version zipapp "$@"
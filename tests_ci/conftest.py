@@ -0,0 +1 @@
+from .fixtures import package_index, repo_from_template, repo_templates  # noqa: F401
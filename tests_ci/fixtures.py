@@ -1,12 +1,37 @@
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import os
+from pathlib import Path
+import re
+import shutil
+from threading import Lock, Thread
 from types import MappingProxyType
-from typing import Mapping, Optional
+from typing import Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+from uuid import uuid4
 
+from git import Repo
 from poetry.core.semver import Version
+import pytest
 
+from scripts.release.version._version._index import VersionIndex
 from scripts.release.version._version._stages import Stage
 from scripts.release.version._version._providers import IVersionProvider
 
-__all__ = ["DummyVersionProvider"]
+__all__ = [
+    "add_change",
+    "CONTINUOUS_DEPLOYMENT_STEPS",
+    "DummyVersionProvider",
+    "GIT_FLOW_STEPS",
+    "package_index",
+    "PackageIndex",
+    "repo_from_template",
+    "repo_scenario",
+    "repo_steps",
+    "RepoStep",
+    "repo_templates",
+    "RepoTemplates",
+    "REPO_SCENARIOS",
+]
 
 
 class DummyVersionProvider(IVersionProvider):
@@ -16,10 +41,12 @@ class DummyVersionProvider(IVersionProvider):
             current_version: Optional[Version] = None,
             latest_version: Optional[Version] = None,
             latest_versions: Mapping[Stage, Version] = MappingProxyType({}),
+            line_versions: Sequence[Version] = (),
     ):
         self._current_version = current_version
         self._latest_version = latest_version
         self._latest_versions = latest_versions
+        self._line_versions = VersionIndex(line_versions)
 
     @classmethod
     def from_string(cls, current_version: str = "", latest_version: str = ""):
@@ -35,3 +62,341 @@ class DummyVersionProvider(IVersionProvider):
         if in_stage:
             return self._latest_versions.get(in_stage, default=None)
         return self._latest_version
+
+    def get_latest_version_in_line(self, major: int, minor: int, in_stage: Optional[Stage] = None) -> Optional[Version]:
+        return self._line_versions.get_latest_version_in_line(major, minor, in_stage)
+
+
+def add_change(repo: Repo, a_change: str) -> None:
+
+    # each change goes to its own file so that branches of a scenario merge without conflicts
+    file = Path(repo.working_dir) / f"change-{uuid4().hex[:8]}.txt"
+    file.write_text(a_change)
+
+    # commit the change
+    repo.git.add(file.name)
+    repo.index.commit(f"committing: {a_change}")
+
+
+ScenarioBuilder = Callable[[Repo], None]
+
+
+class RepoScenario(NamedTuple):
+    build: ScenarioBuilder
+    base: Optional[str]
+
+
+REPO_SCENARIOS: Dict[str, RepoScenario] = {}
+
+
+def repo_scenario(name: str, *, base: Optional[str] = None) -> Callable[[ScenarioBuilder], ScenarioBuilder]:
+    """
+    Registers a function building a named repository scenario. If a base scenario is given, the function receives a
+    copy of the base scenario's repository and only has to apply the steps that come on top of it.
+    """
+
+    def register(build: ScenarioBuilder) -> ScenarioBuilder:
+        if name in REPO_SCENARIOS:
+            raise ValueError(f"A repository scenario named: {name} is already registered.")
+        REPO_SCENARIOS[name] = RepoScenario(build, base)
+        return build
+
+    return register
+
+
+class RepoTemplates:
+    """
+    Builds each repository scenario once and stores it as a template in the directory provided. Tests get a copy of
+    the template in which the git object database is hard-linked: git objects are immutable and git rewrites refs and
+    the index through a lock file and a rename, so the copies never write through to the template.
+
+    Templates are published with an atomic rename of a fully built directory. When several processes share the same
+    template directory (f.ex. pytest-xdist workers) the first one to publish wins and the others reuse its template.
+    """
+
+    def __init__(self, root: Path):
+        self._root = root
+        self._root.mkdir(parents=True, exist_ok=True)
+
+    def get(self, name: str) -> Path:
+        template_path = self._root / name
+        if template_path.exists():
+            return template_path
+
+        scenario = REPO_SCENARIOS[name]
+        build_path = self._root / f".{name}-{uuid4().hex}"
+        if scenario.base is None:
+            repo = _init_repo(build_path)
+        else:
+            repo = self.copy(scenario.base, build_path)
+        scenario.build(repo)
+        repo.close()
+
+        try:
+            build_path.rename(template_path)
+        except OSError:
+            # another process published the template first
+            shutil.rmtree(build_path, ignore_errors=True)
+        return template_path
+
+    def copy(self, name: str, destination: Path) -> Repo:
+        template_path = self.get(name)
+        objects_path = template_path / ".git" / "objects"
+
+        def link_or_copy(source: str, target: str) -> None:
+            if objects_path in Path(source).parents:
+                os.link(source, target)
+            else:
+                shutil.copy2(source, target)
+
+        shutil.copytree(template_path, destination, copy_function=link_or_copy)
+        return Repo(destination)
+
+
+def _init_repo(path: Path) -> Repo:
+    repo = Repo.init(path)
+    repo.git.symbolic_ref("HEAD", "refs/heads/master")
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "ci-with-poetry")
+        config.set_value("user", "email", "ci-with-poetry@example.com")
+    return repo
+
+
+@pytest.fixture(scope="session")
+def repo_templates(tmp_path_factory) -> RepoTemplates:
+    # pytest-xdist workers each get their own base temporary directory whose parent is specific to the test run:
+    # templates are shared between workers there.
+    base_path = tmp_path_factory.getbasetemp()
+    if os.environ.get("PYTEST_XDIST_WORKER"):
+        base_path = base_path.parent
+    return RepoTemplates(base_path / "repo-templates")
+
+
+@pytest.fixture
+def repo_from_template(repo_templates, tmp_path) -> Iterator[Callable[[str], Repo]]:
+    repos: List[Repo] = []
+
+    def factory(name: str) -> Repo:
+        repo = repo_templates.copy(name, tmp_path / f"{name}-{len(repos)}")
+        repos.append(repo)
+        return repo
+
+    yield factory
+
+    for repo in repos:
+        repo.close()
+
+
+class PackageIndex:
+    """
+    A local stand-in for a package index implementing the legacy upload API and the simple index. The status codes of
+    the next responses to uploads of a file can be scripted with fail_next.
+    """
+
+    def __init__(self):
+        self.files: Dict[str, bytes] = {}
+        self.fields: Dict[str, Dict[str, List[str]]] = {}
+        self.upload_attempts: Dict[str, int] = {}
+        self._scripted_statuses: Dict[str, List[int]] = {}
+        self._lock = Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._get_handler())
+        self._thread = Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def upload_url(self) -> str:
+        return f"{self.url}/legacy/"
+
+    @property
+    def simple_index_url(self) -> str:
+        return f"{self.url}/simple/"
+
+    def fail_next(self, file_name: str, *status_codes: int) -> None:
+        self._scripted_statuses.setdefault(file_name, []).extend(status_codes)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _get_handler(self):
+        index = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                message = BytesParser().parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+                )
+                file_part = next(part for part in message.get_payload() if part.get_filename())
+                file_name = file_part.get_filename()
+                with index._lock:
+                    index.upload_attempts[file_name] = index.upload_attempts.get(file_name, 0) + 1
+                    scripted_statuses = index._scripted_statuses.get(file_name)
+                    if scripted_statuses:
+                        status = scripted_statuses.pop(0)
+                    elif file_name in index.files:
+                        status = 409
+                    else:
+                        index.files[file_name] = file_part.get_payload(decode=True)
+                        index.fields[file_name] = _get_form_fields(message)
+                        status = 200
+                self.send_response(status)
+                self.end_headers()
+
+            def do_GET(self):
+                project_name = self.path.rstrip("/").split("/")[-1]
+                with index._lock:
+                    links = [
+                        f'<a href="/files/{name}">{name}</a>'
+                        for name in index.files
+                        if re.sub(r"[-_.]+", "-", name).lower().startswith(f"{project_name}-")
+                    ]
+                content = f"<html><body>{''.join(links)}</body></html>".encode()
+                self.send_response(200 if links else 404)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
+
+
+def _get_form_fields(message) -> Dict[str, List[str]]:
+    fields: Dict[str, List[str]] = {}
+    for part in message.get_payload():
+        if not part.get_filename():
+            name = part.get_param("name", header="content-disposition")
+            fields.setdefault(name, []).append(part.get_payload(decode=True).decode())
+    return fields
+
+
+@pytest.fixture
+def package_index() -> Iterator[PackageIndex]:
+    index = PackageIndex()
+    index.start()
+    yield index
+    index.stop()
+
+
+class RepoStep(NamedTuple):
+    name: str
+    change: ScenarioBuilder
+    expected_version: Callable[[Repo], Version]
+
+
+def repo_steps(steps: Sequence[RepoStep]) -> List[Tuple[str, RepoStep]]:
+    """
+    Registers one repository scenario per step: the scenario of the previous step with the change of the step applied
+    and its head commit tagged with the expected version. Returns each step with the scenario it starts from so that
+    tests can replay any step from a copy of its base.
+    """
+    steps_with_base = []
+    base = EMPTY_REPO
+    for step in steps:
+
+        def build(repo: Repo, step: RepoStep = step) -> None:
+            step.change(repo)
+            repo.create_tag(f"v{step.expected_version(repo).text}", message=step.name)
+
+        repo_scenario(step.name, base=base)(build)
+        steps_with_base.append((base, step))
+        base = step.name
+    return steps_with_base
+
+
+def _chain(*builders: ScenarioBuilder) -> ScenarioBuilder:
+
+    def chain(repo: Repo) -> None:
+        for build in builders:
+            build(repo)
+
+    return chain
+
+
+def _checkout(branch: str, *, create: bool = False) -> ScenarioBuilder:
+
+    def checkout(repo: Repo) -> None:
+        (repo.create_head(branch) if create else repo.heads[branch]).checkout()
+
+    return checkout
+
+
+def _changes(*changes: str) -> ScenarioBuilder:
+
+    def apply_changes(repo: Repo) -> None:
+        for a_change in changes:
+            add_change(repo, a_change)
+
+    return apply_changes
+
+
+def _merge(branch: str, into: str, *, delete: bool = False) -> ScenarioBuilder:
+
+    def merge(repo: Repo) -> None:
+        repo.heads[into].checkout()
+        repo.git.merge(branch)
+        if delete:
+            repo.delete_head(branch)
+
+    return merge
+
+
+def _alpha(minor: int) -> Callable[[Repo], Version]:
+    return lambda repo: Version(0, minor, 0, pre="alpha", build=repo.head.commit.hexsha[:8])
+
+
+def _fixed(version: str) -> Callable[[Repo], Version]:
+    return lambda _: Version.parse(version)
+
+
+EMPTY_REPO = "empty"
+repo_scenario(EMPTY_REPO)(lambda _: None)
+
+GIT_FLOW_STEPS = repo_steps([
+    RepoStep("git-flow-initial", _changes("initial commit"), _fixed("0.0.0")),
+    RepoStep("git-flow-develop", _chain(_checkout("develop", create=True), _changes("some development")), _alpha(1)),
+    RepoStep(
+        "git-flow-release-candidate",
+        _chain(_changes("another development"), _checkout("release/v0.1", create=True)),
+        _fixed("0.1.0-rc1"),
+    ),
+    RepoStep("git-flow-release-candidate-2", _changes("a change to the release candidate"), _fixed("0.1.0-rc2")),
+    RepoStep("git-flow-patch", _chain(_checkout("master"), _changes("a patch")), _fixed("0.0.1")),
+    RepoStep("git-flow-develop-2", _chain(_checkout("develop"), _changes("some more development")), _alpha(2)),
+    RepoStep("git-flow-release", _merge("release/v0.1", "master", delete=True), _fixed("0.1.0")),
+    RepoStep(
+        "git-flow-hotfix",
+        _chain(
+            _checkout("hotfix/something-did-not-work", create=True),
+            _changes("something did not work", "something else did not work"),
+        ),
+        _fixed("0.1.0+post1"),
+    ),
+    RepoStep(
+        "git-flow-hotfix-merged", _merge("hotfix/something-did-not-work", "master", delete=True), _fixed("0.1.1")
+    ),
+])
+
+CONTINUOUS_DEPLOYMENT_STEPS = repo_steps([
+    RepoStep("continuous-deployment-initial", _changes("initial commit"), _fixed("0.0.0")),
+    RepoStep(
+        "continuous-deployment-develop",
+        _chain(_checkout("develop", create=True), _changes("some development")),
+        _alpha(1),
+    ),
+    RepoStep("continuous-deployment-release", _merge("develop", "master"), _fixed("0.1.0")),
+    RepoStep(
+        # the development commit is not versioned
+        "continuous-deployment-release-2",
+        _chain(_checkout("develop"), _changes("some more development"), _merge("develop", "master")),
+        _fixed("0.2.0"),
+    ),
+])
@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from scripts.release.version._version._commands import audit_tags, TagIssue
+from scripts.release.version._version._commands._audit import _map_in_window
+from .fixtures import add_change
+
+
+@pytest.fixture
+def audited_repo(repo_from_template):
+    repo = repo_from_template("git-flow-develop")
+    develop_sha = repo.head.commit.hexsha
+    master_sha = repo.heads["master"].commit.hexsha
+    add_change(repo, "a change")
+
+    repo.create_tag("deploy-2021", ref=develop_sha)
+    repo.create_tag("v0.1.0rc1", ref=develop_sha, message="a release candidate without a dash")
+    repo.create_tag("v0.10.0", ref=develop_sha)
+    repo.create_tag("0.0.0", ref=master_sha)
+    repo.create_tag("v0.2.0", ref=develop_sha)
+    repo.create_tag("v0.2.0-beta1", ref=develop_sha)
+    repo.create_tag("v0.2.x", ref=develop_sha)
+    repo.create_tag("0.2.0", ref="HEAD")
+    repo.create_tag("v0.3.0-alpha+deadbeef", ref="HEAD", message="an alpha of a missing commit")
+    repo.create_tag(f"v0.3.0-alpha+{master_sha[:8]}", ref="HEAD")
+    repo.create_tag(f"v0.3.0-alpha+{repo.head.commit.hexsha[:8]}", ref="HEAD")
+    return repo
+
+
+def _get_issues(report):
+    return sorted(((audit.tag, audit.issue) for audit in report.issues), key=lambda issue: (issue[0], issue[1].value))
+
+
+def test_audit_tags_of_a_clean_repo(repo_from_template):
+    repo = repo_from_template("git-flow-release-candidate")
+    report = audit_tags(repo)
+    assert report.n_tags == report.n_version_tags == len(repo.tags)
+    assert report.issues == []
+
+
+def test_audit_tags(audited_repo):
+    report = audit_tags(audited_repo)
+    master_sha = audited_repo.heads["master"].commit.hexsha
+
+    assert report.n_tags == len(audited_repo.tags)
+    assert report.n_version_tags == report.n_tags - 7
+    assert _get_issues(report) == sorted(
+        [
+            ("v0.1.0rc1", TagIssue.REJECTED),
+            ("v0.10.0", TagIssue.REJECTED),
+            ("0.0.0", TagIssue.REJECTED),
+            ("0.0.0", TagIssue.DUPLICATE),
+            ("v0.0.0", TagIssue.DUPLICATE),
+            ("v0.2.0-beta1", TagIssue.REJECTED),
+            ("v0.2.x", TagIssue.REJECTED),
+            ("0.2.0", TagIssue.REJECTED),
+            ("0.2.0", TagIssue.CONFLICT),
+            ("v0.2.0", TagIssue.CONFLICT),
+            ("v0.3.0-alpha+deadbeef", TagIssue.MISSING_COMMIT),
+            (f"v0.3.0-alpha+{master_sha[:8]}", TagIssue.WRONG_COMMIT),
+        ],
+        key=lambda issue: (issue[0], issue[1].value),
+    )
+    details = {(audit.tag, audit.issue): audit.detail for audit in report.issues}
+    assert details["v0.1.0rc1", TagIssue.REJECTED] == "the tag is not in the canonical form: v0.1.0-rc1"
+    assert "multi-digit" in details["v0.10.0", TagIssue.REJECTED]
+    assert details["v0.2.0-beta1", TagIssue.REJECTED] == "the tag is not a valid version tag"
+    assert details["v0.2.x", TagIssue.REJECTED] == "the tag is not a valid version tag"
+    assert details[f"v0.3.0-alpha+{master_sha[:8]}", TagIssue.WRONG_COMMIT].endswith(master_sha)
+
+
+def test_audit_tags_in_a_process_pool(audited_repo):
+    report = audit_tags(audited_repo)
+    pooled_report = audit_tags(audited_repo, max_workers=2, chunk_size=3)
+    assert pooled_report.n_tags == report.n_tags
+    assert pooled_report.n_version_tags == report.n_version_tags
+    assert set(pooled_report.issues) == set(report.issues)
+    assert len(pooled_report.issues) == len(report.issues)
+
+
+def test_audit_tags_chunks_in_flight_are_bounded():
+    read_chunks = []
+
+    def chunks():
+        for i in range(10):
+            read_chunks.append(i)
+            yield [f"v0.0.{i} {i:040x}"]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for i, (n_tags, audited_tags) in enumerate(_map_in_window(executor, chunks(), 3)):
+            assert len(read_chunks) <= i + 4
+            assert (n_tags, audited_tags[0].name) == (1, f"v0.0.{i}")
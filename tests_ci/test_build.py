@@ -0,0 +1,97 @@
+from email.parser import Parser
+from pathlib import Path
+import tarfile
+from zipfile import ZipFile
+
+from git import Repo
+from poetry.core.semver import Version
+from poetry.core.toml import TOMLFile
+
+from scripts.release.version import backend
+from scripts.release.version._version._commands import build_package, tag_version
+from .fixtures import add_change
+
+PYPROJECT = """[tool.poetry]
+name = "a-package"
+version = "0.0.0"
+description = "A package"
+authors = ["ci-with-poetry <ci-with-poetry@example.com>"]
+
+[tool.poetry.dependencies]
+python = "^3.7"
+
+[build-system]
+requires = ["poetry-core>=1.0,<1.1", "gitpython>=3.1"]
+build-backend = "version.backend"
+backend-path = ["scripts/release"]
+"""
+VERSION_FILE = '"""\nA package.\n"""\n__version__ = "0.0.0"\n'
+
+
+def _add_project(project_dir: Path) -> None:
+    (project_dir / "pyproject.toml").write_text(PYPROJECT)
+    (project_dir / "a_package").mkdir()
+    (project_dir / "a_package" / "__init__.py").write_text(VERSION_FILE)
+
+
+def _assert_project_untouched(project_dir: Path) -> None:
+    assert (project_dir / "pyproject.toml").read_text() == PYPROJECT
+    assert (project_dir / "a_package" / "__init__.py").read_text() == VERSION_FILE
+
+
+def test_build_package(tmp_path):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    _add_project(project_dir)
+
+    wheel_path, sdist_path = build_package(
+        Version.parse("1.2.0-rc1"), tmp_path / "dist", project_dir=project_dir, formats=["wheel", "sdist"]
+    )
+    _assert_project_untouched(project_dir)
+    stamped_version_file = VERSION_FILE.replace("0.0.0", "1.2.0-rc1")
+
+    assert wheel_path.name == "a_package-1.2.0rc1-py3-none-any.whl"
+    with ZipFile(wheel_path) as wheel:
+        assert wheel.read("a_package/__init__.py").decode() == stamped_version_file
+        metadata = Parser().parsestr(wheel.read("a_package-1.2.0rc1.dist-info/METADATA").decode())
+        assert metadata["Version"] == "1.2.0rc1"
+        record = wheel.read("a_package-1.2.0rc1.dist-info/RECORD").decode()
+        assert "a_package/__init__.py,sha256=" in record
+
+    assert sdist_path.name == "a-package-1.2.0rc1.tar.gz"
+    with tarfile.open(sdist_path) as sdist:
+        root = "a-package-1.2.0rc1"
+        assert sdist.extractfile(f"{root}/a_package/__init__.py").read().decode() == stamped_version_file
+        assert Parser().parsestr(sdist.extractfile(f"{root}/PKG-INFO").read().decode())["Version"] == "1.2.0rc1"
+        sdist.extract(f"{root}/pyproject.toml", tmp_path)
+    pyproject = TOMLFile(tmp_path / root / "pyproject.toml").read()
+    assert pyproject["tool"]["poetry"]["version"] == "1.2.0-rc1"
+    assert pyproject["build-system"]["build-backend"] == "poetry.core.masonry.api"
+    assert "backend-path" not in pyproject["build-system"]
+
+
+def test_build_backend_uses_the_version_of_the_current_commit(repo_from_template, tmp_path, monkeypatch):
+    repo: Repo = repo_from_template("git-flow-initial")
+    project_dir = Path(repo.working_tree_dir)
+    _add_project(project_dir)
+    add_change(repo, "a patch")
+    tag_version(repo, Version.parse("0.0.1"))
+    monkeypatch.chdir(project_dir)
+
+    assert backend.build_wheel(str(tmp_path / "dist")) == "a_package-0.0.1-py3-none-any.whl"
+    assert backend.build_sdist(str(tmp_path / "dist"), {"version": "0.1.0"}) == "a-package-0.1.0.tar.gz"
+
+    add_change(repo, "an unversioned change")
+    assert backend.build_wheel(str(tmp_path / "dist")) == "a_package-0.0.0-py3-none-any.whl"
+    _assert_project_untouched(project_dir)
+
+
+def test_build_backend_outside_a_git_checkout(tmp_path, monkeypatch):
+    project_dir = tmp_path / "project"
+    project_dir.mkdir()
+    _add_project(project_dir)
+    monkeypatch.chdir(project_dir)
+
+    assert backend.build_wheel(str(tmp_path / "dist")) == "a_package-0.0.0-py3-none-any.whl"
+    assert backend.build_sdist(str(tmp_path / "dist"), {"version": "0.1.0"}) == "a-package-0.1.0.tar.gz"
+    _assert_project_untouched(project_dir)
@@ -1,115 +1,275 @@
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from multiprocessing import get_context
 from unittest.mock import patch
 from pathlib import Path
+import subprocess
+import sys
 
 from git import Repo
 from poetry.core.semver import Version
 import pytest
 
-from scripts.release.version._version._commands import get_version, tag_version
+from scripts.release.version._version import _commands
+from scripts.release.version._version._commands import (
+    get_version, iter_versions, preview_versions, tag_version, VersionSession
+)
+from scripts.release.version._version._snapshot import HeadRefSnapshot
 from scripts.release.version._version._commands._add import _add_version_to_package_version_file
+from scripts.release.version._version._watch import InotifyRefWatcher, PollingRefWatcher
+from .fixtures import add_change, CONTINUOUS_DEPLOYMENT_STEPS, GIT_FLOW_STEPS
 
 
+@pytest.mark.parametrize(
+    "base, step", [pytest.param(base, step, id=step.name) for base, step in CONTINUOUS_DEPLOYMENT_STEPS]
+)
 @patch("scripts.release.version._version._commands._get.CONTINUOUS_DEPLOYMENT", return_value=True)
-def test_continuous_delivery(_, git_repo):
+def test_continuous_delivery(_, base, step, repo_from_template):
+    repo = repo_from_template(base)
+    step.change(repo)
+    _infer_version_and_add(repo, step.expected_version(repo))
 
-    # initial commit to master
-    _add_change(git_repo, "initial commit")
-    master = git_repo.api.refs[0]
-    _infer_version_and_add(git_repo.api, Version(0, 0, 0))
 
-    # add a development commit
-    develop = git_repo.api.create_head("develop")
-    develop.checkout()
-    _add_change(git_repo, "some development")
-    _infer_version_and_add(git_repo.api, Version(0, 1, 0, pre="alpha", build=git_repo.api.head.commit.hexsha[:8]))
+@pytest.mark.parametrize("base, step", [pytest.param(base, step, id=step.name) for base, step in GIT_FLOW_STEPS])
+def test_git_flow(base, step, repo_from_template):
+    repo = repo_from_template(base)
+    step.change(repo)
+    _infer_version_and_add(repo, step.expected_version(repo))
 
-    # merge to master
-    master.checkout()
-    git_repo.api.git.merge(develop)
-    _infer_version_and_add(git_repo.api, Version(0, 1, 0))
 
-    # add another a development commit not inferred
-    develop.checkout()
-    _add_change(git_repo, "some more development")
+def _infer_version_and_add(repo: Repo, expected_version: Version) -> None:
+    version = get_version(repo, infer=True, include_alpha=True)
+    assert version == expected_version
+    tag_version(repo, version)
+    assert f"v{expected_version.text}" in repo.tags
 
-    # merge to master
-    master.checkout()
-    git_repo.api.git.merge(develop)
-    _infer_version_and_add(git_repo.api, Version(0, 2, 0))
 
+@pytest.mark.parametrize(
+    "continuous_deployment, base, step",
+    [pytest.param(False, base, step, id=step.name) for base, step in GIT_FLOW_STEPS]
+    + [pytest.param(True, base, step, id=step.name) for base, step in CONTINUOUS_DEPLOYMENT_STEPS],
+)
+def test_get_version_streaming_tags(continuous_deployment, base, step, repo_from_template):
+    repo = repo_from_template(base)
+    step.change(repo)
+    with patch("scripts.release.version._version._commands._get.CONTINUOUS_DEPLOYMENT", continuous_deployment):
+        assert get_version(repo, infer=True, include_alpha=True, stream=True) == step.expected_version(repo)
 
-def test_git_flow(git_repo):
 
-    # initial commit to master
-    _add_change(git_repo, "initial commit")
-    master = git_repo.api.refs[0]
-    _infer_version_and_add(git_repo.api, Version(0, 0, 0))
+@pytest.mark.parametrize(
+    "scenario, branch, expected",
+    [
+        pytest.param("git-flow-initial", "master", "0.0.0", id="git-flow-initial"),
+        pytest.param("git-flow-develop", "master", "0.0.0", id="master-after-develop"),
+        pytest.param("git-flow-release-candidate", "release/v0.1", "0.1.0-rc1", id="git-flow-release-candidate"),
+    ]
+)
+def test_get_version_from_template(scenario, branch, expected, repo_from_template):
+    repo = repo_from_template(scenario)
+    repo.heads[branch].checkout()
+    assert get_version(repo, infer=True, include_alpha=True) == Version.parse(expected)
 
-    # add a development commit
-    develop = git_repo.api.create_head("develop")
-    develop.checkout()
-    _add_change(git_repo, "some development")
-    _infer_version_and_add(git_repo.api, Version(0, 1, 0, pre="alpha", build=git_repo.api.head.commit.hexsha[:8]))
 
-    # add another development commit
-    _add_change(git_repo, "another development")
+def test_template_copies_are_independent(repo_from_template):
+    repo = repo_from_template("git-flow-develop")
+    add_change(repo, "a change only in this copy")
+    _infer_version_and_add(repo, Version(0, 1, 0, pre="alpha", build=repo.head.commit.hexsha[:8]))
 
-    # create a release candidate branch
-    release_1 = git_repo.api.create_head("release/v0.1")
-    release_1.checkout()
-    _infer_version_and_add(git_repo.api, Version(0, 1, 0, pre="rc1"))
+    other_repo = repo_from_template("git-flow-develop")
+    assert len(other_repo.tags) == len(repo.tags) - 1
+    assert other_repo.head.commit != repo.head.commit
 
-    # another release candidate
-    _add_change(git_repo, "a change to the release candidate")
-    _infer_version_and_add(git_repo.api, Version(0, 1, 0, pre="rc2"))
 
-    # make a patch on master
-    master.checkout()
-    _add_change(git_repo, "a patch")
-    _infer_version_and_add(git_repo.api, Version(0, 0, 1))
+@pytest.mark.parametrize("scenario", ["git-flow-initial", "git-flow-develop", "git-flow-release-candidate"])
+def test_preview_versions_match_checked_out_versions(scenario, repo_from_template):
+    repo = repo_from_template(scenario)
+    add_change(repo, "an untagged change")
 
-    # another change on develop
-    develop.checkout()
-    _add_change(git_repo, "some more development")
-    _infer_version_and_add(git_repo.api, Version(0, 2, 0, pre="alpha", build=git_repo.api.head.commit.hexsha[:8]))
+    branch_versions = preview_versions(repo, include_alpha=True)
+    assert [branch_version.branch for branch_version in branch_versions] == sorted(head.name for head in repo.heads)
 
-    # release v1
-    master.checkout()
-    git_repo.api.git.merge(release_1)
-    git_repo.api.delete_head(release_1)
-    _infer_version_and_add(git_repo.api, Version(0, 1, 0))
+    for branch_version in branch_versions:
+        repo.heads[branch_version.branch].checkout()
+        assert branch_version.commit_sha == repo.head.commit.hexsha
+        assert branch_version.error is None
+        assert branch_version.version == get_version(repo, infer=True, include_alpha=True)
 
-    # create a hotfix branch and add changes to it
-    hotfix = git_repo.api.create_head("hotfix/something-did-not-work")
-    hotfix.checkout()
-    _add_change(git_repo, "something did not work")
-    _add_change(git_repo, "something else did not work")
-    _infer_version_and_add(git_repo.api, Version(0, 1, 0,  build=f"post1"))
 
-    # merge hotfix branch to master
-    master.checkout()
-    git_repo.api.git.merge(hotfix)
-    git_repo.api.delete_head(hotfix)
-    _infer_version_and_add(git_repo.api, Version(0, 1, 1))
+def _inotify_watcher(git_dir: str) -> InotifyRefWatcher:
+    pytest.importorskip("inotify_simple")
+    return InotifyRefWatcher(Path(git_dir))
 
 
-def _add_change(git_repo, a_change: str) -> None:
+WATCHERS = [
+    pytest.param(lambda git_dir: PollingRefWatcher(Path(git_dir), interval=0.01), id="polling"),
+    pytest.param(_inotify_watcher, id="inotify"),
+]
 
-    # add changes to our file
-    file = git_repo.workspace / 'committed.txt'
-    file_text = file.read_text() if file.exists() else ""
-    file.write_text(f"{file_text}\n{a_change}" if file_text else a_change)
 
-    # commit the change
-    git_repo.api.git.add(update=True)
-    git_repo.api.index.commit(f"committing: {a_change}")
+@pytest.mark.parametrize("get_watcher", WATCHERS)
+def test_ref_watcher(get_watcher, repo_from_template):
+    repo = repo_from_template("git-flow-develop")
+    watcher = get_watcher(repo.git_dir)
+    try:
+        assert not watcher.wait(timeout=0.05)
 
+        # a ref in a directory created after the watcher
+        repo.create_head("feature/something")
+        assert watcher.wait(timeout=5)
 
-def _infer_version_and_add(repo: Repo, expected_version: Version) -> None:
-    version = get_version(repo, infer=True, include_alpha=True)
-    assert version == expected_version
-    tag_version(repo, version)
-    assert f"v{expected_version.text}" in repo.tags
+        # refs moved to packed-refs
+        repo.git.pack_refs(all=True)
+        assert watcher.wait(timeout=5)
+
+        # HEAD moved to another branch
+        repo.heads["master"].checkout()
+        assert watcher.wait(timeout=5)
+    finally:
+        watcher.close()
+
+
+@pytest.mark.parametrize("get_watcher", WATCHERS)
+def test_iter_versions_follows_ref_changes(get_watcher, repo_from_template):
+    repo = repo_from_template("git-flow-develop")
+    watcher = get_watcher(repo.git_dir)
+    versions = iter_versions(repo, infer=True, include_alpha=True, watcher=watcher)
+    assert next(versions) == Version.parse(f"0.1.0-alpha+{repo.head.commit.hexsha[:8]}")
+
+    # a new commit moves HEAD
+    add_change(repo, "more development")
+    expected_version = Version(0, 1, 0, pre="alpha", build=repo.head.commit.hexsha[:8])
+    assert next(versions) == expected_version
+
+    # a release candidate tagged on the commit
+    repo.create_head("release/v0.1").checkout()
+    tag_version(repo, Version.parse("0.1.0-rc1"))
+    assert next(versions) == Version.parse("0.1.0-rc1")
+
+    # back on develop the release candidate tag is still on the current commit
+    repo.heads["develop"].checkout()
+    add_change(repo, "development after the release candidate")
+    assert next(versions) == Version(0, 2, 0, pre="alpha", build=repo.head.commit.hexsha[:8])
+    versions.close()
+
+
+def _tag_version_in_own_repo(repo_path: str, version_text: str) -> bool:
+    # each CI job has its own process and its own Repo
+    repo = Repo(repo_path)
+    try:
+        return tag_version(repo, Version.parse(version_text))
+    finally:
+        repo.close()
+
+
+def test_concurrent_tag_version(repo_from_template):
+    repo = repo_from_template("git-flow-develop")
+    add_change(repo, "more development")
+    version = Version(0, 1, 0, pre="alpha", build=repo.head.commit.hexsha[:8])
+
+    with ProcessPoolExecutor(max_workers=4, mp_context=get_context("spawn")) as executor:
+        jobs = [executor.submit(_tag_version_in_own_repo, repo.working_tree_dir, version.text) for _ in range(8)]
+        created = [job.result() for job in jobs]
+    assert created.count(True) == 1
+    assert repo.tags[f"v{version.text}"].commit == repo.head.commit
+    assert repo.tags[f"v{version.text}"].tag.message == (
+        f"tagging commit: {repo.head.commit.hexsha} with version: {version.text}"
+    )
+
+    # a version tagged on another commit cannot be tagged again unless forced
+    add_change(repo, "even more development")
+    with pytest.raises(ValueError):
+        tag_version(repo, version)
+    assert tag_version(repo, version, force_tag=True)
+    assert repo.tags[f"v{version.text}"].commit == repo.head.commit
+
+    # forcing a version already tagged on the commit keeps its tag
+    tag_sha = repo.tags[f"v{version.text}"].tag.hexsha
+    assert tag_version(repo, version, force_tag=True) is False
+    assert repo.tags[f"v{version.text}"].tag.hexsha == tag_sha
+
+
+def test_tag_version_losing_the_race(repo_from_template):
+    repo = repo_from_template("git-flow-develop")
+    version = Version(0, 1, 0, pre="alpha", build=repo.head.commit.hexsha[:8])
+
+    # the lookup misses the tag created by another job just before the compare-and-swap
+    with patch(
+        "scripts.release.version._version._commands._tag._get_tagged_commit_sha",
+        side_effect=[None, repo.head.commit.hexsha],
+    ):
+        assert tag_version(repo, version) is False
+
+    add_change(repo, "more development")
+    with patch(
+        "scripts.release.version._version._commands._tag._get_tagged_commit_sha",
+        side_effect=[None, repo.head.commit.parents[0].hexsha],
+    ):
+        with pytest.raises(ValueError):
+            tag_version(repo, version)
+
+
+def _clone(remote: Repo, path: Path) -> Repo:
+    clone = remote.clone(str(path))
+    with clone.config_writer() as config:
+        # each job has its own identity so that the tag objects of the jobs differ
+        config.set_value("user", "name", path.name)
+        config.set_value("user", "email", f"{path.name}@example.com")
+    return clone
+
+
+def test_tag_version_losing_the_push(repo_from_template, tmp_path):
+    repo = repo_from_template("git-flow-develop")
+    add_change(repo, "more development")
+    version = Version(0, 1, 0, pre="alpha", build=repo.head.commit.hexsha[:8])
+    tag = f"v{version.text}"
+
+    # the jobs clone the remote repository before any of them pushes the tag
+    remote = repo.clone(str(tmp_path / "remote.git"), bare=True)
+    winner, loser, other = (_clone(remote, tmp_path / name) for name in ("winner", "loser", "other"))
+
+    assert tag_version(winner, version, push_tag=True)
+    assert tag_version(loser, version, push_tag=True) is False
+    assert loser.tags[tag].tag.hexsha == winner.tags[tag].tag.hexsha == remote.tags[tag].tag.hexsha
+
+    add_change(other, "a change of another job")
+    with pytest.raises(ValueError):
+        tag_version(other, version, push_tag=True)
+    assert remote.tags[tag].commit == winner.head.commit
+
+
+def test_version_session_reuses_its_state(repo_from_template):
+    repo = repo_from_template("git-flow-develop")
+    add_change(repo, "more development")
+    session = VersionSession(repo)
+
+    with patch.object(HeadRefSnapshot, "refresh", autospec=True, side_effect=HeadRefSnapshot.refresh) as refresh:
+        version = session.get_version(infer=True, include_alpha=True)
+        assert version == get_version(repo, infer=True, include_alpha=True)
+        assert session.get_version(include_alpha=True) is None
+        assert session.get_version(infer=True, include_alpha=True) == version
+        assert refresh.call_count == 1
+
+        # tagging from the session refreshes its state
+        assert session.tag_version(version)
+        assert session.get_version(include_alpha=True) == version
+        assert refresh.call_count == 2
+
+        # so does moving HEAD
+        repo.create_head("release/v0.1").checkout()
+        assert session.get_version(infer=True) == Version.parse("0.1.0-rc1")
+        assert refresh.call_count == 3
+
+
+def test_version_session_stamps_its_own_project(repo_from_template):
+    repo = repo_from_template("git-flow-initial")
+    project_dir = Path(repo.working_tree_dir)
+    (project_dir / "pyproject.toml").write_text('[tool.poetry]\nname = "a-package"\nversion = "0.0.0"\n')
+    (project_dir / "a_package").mkdir()
+    (project_dir / "a_package" / "__init__.py").write_text('__version__ = "0.0.0"\n')
+
+    VersionSession(repo).add_version_to_project(Version.parse("0.1.0"))
+    assert 'version = "0.1.0"' in (project_dir / "pyproject.toml").read_text()
+    assert (project_dir / "a_package" / "__init__.py").read_text() == '__version__ = "0.1.0"\n'
 
 
 @pytest.mark.parametrize(
@@ -129,3 +289,50 @@ def test_add_package(file_name, n_replaced, n_not_replaced, tmp_path):
     assert with_version.count("0.0.0") == 0
     assert with_version.count("1.0.0") == n_replaced
     assert with_version.count("1.1.1") == n_not_replaced
+
+
+def test_get_version_of_detached_head(repo_from_template):
+    repo = repo_from_template("git-flow-develop")
+    add_change(repo, "an untagged change")
+    develop_sha = repo.head.commit.hexsha
+    alpha_version = Version.parse(f"0.1.0-alpha+{develop_sha[:8]}")
+
+    # the head of develop only
+    repo.git.checkout(develop_sha)
+    assert get_version(repo, infer=True, include_alpha=True) == alpha_version
+
+    # the head of a release branch takes precedence over develop, even as a remote-tracking branch
+    repo.git.update_ref("refs/remotes/origin/release/v0.1", develop_sha)
+    assert get_version(repo, infer=True, include_alpha=True) == Version.parse("0.1.0-rc1")
+    assert VersionSession(repo).get_version(infer=True, include_alpha=True) == Version.parse("0.1.0-rc1")
+
+    # only branches whose head is the commit are considered, not branches it was merged into
+    repo.heads["develop"].checkout()
+    add_change(repo, "more development")
+    repo.git.update_ref("-d", "refs/remotes/origin/release/v0.1")
+    repo.create_head("release/v0.1", repo.head.commit.hexsha)
+    repo.create_head("feature/something", develop_sha)
+    repo.git.checkout(develop_sha)
+    # the release branch makes the feature branch the development of the next release
+    assert get_version(repo, infer=True, include_alpha=True) == Version.parse(f"0.2.0-alpha+{develop_sha[:8]}")
+    repo.delete_head("feature/something")
+    assert get_version(repo, infer=True, include_alpha=True) is None
+
+    # commits that are the head of no branch keep their current version
+    add_change(repo, "a change on no branch")
+    assert get_version(repo, infer=True, include_alpha=True) is None
+
+
+def test_commands_exports():
+    modules = set(_commands.EXPORTS.values())
+    exported = {name: module for module in modules for name in import_module(module, _commands.__name__).__all__}
+    assert exported == _commands.EXPORTS
+
+
+def test_cli_imports_commands_lazily():
+    import_cli = (
+        "import sys; import scripts.release.version.__main__; "
+        "print(sorted(name for name in sys.modules if name.startswith('scripts.release.version._version._commands.')))"
+    )
+    result = subprocess.run([sys.executable, "-c", import_cli], check=True, capture_output=True, text=True)
+    assert result.stdout == "[]\n"
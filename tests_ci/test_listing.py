@@ -0,0 +1,96 @@
+import json
+import subprocess
+import sys
+
+from poetry.core.semver import Version
+import pytest
+
+from scripts.release.version._version._commands import get_listed_versions, get_version, tag_version
+from scripts.release.version._version._providers import ProvideVersionError, VersionProviderFromTags
+from scripts.release.version._version._snapshot import read_ref_listing
+from .fixtures import CONTINUOUS_DEPLOYMENT_STEPS
+
+
+@pytest.mark.parametrize(
+    "base, step", [pytest.param(base, step, id=step.name) for base, step in CONTINUOUS_DEPLOYMENT_STEPS]
+)
+@pytest.mark.parametrize("listing_command", ["ls-remote", "show-ref"])
+def test_get_listed_versions(base, step, listing_command, repo_from_template):
+    repo = repo_from_template(base)
+    step.change(repo)
+    expected_version = step.expected_version(repo)
+
+    def list_refs() -> str:
+        if listing_command == "ls-remote":
+            return repo.git.ls_remote(repo.working_tree_dir)
+        return repo.git.show_ref(dereference=True)
+
+    listed_versions = get_listed_versions(list_refs().splitlines(), branch=repo.active_branch.name)
+    assert listed_versions.commit_sha == repo.head.commit.hexsha
+    assert listed_versions.current_version == get_version(repo, include_alpha=True)
+    assert listed_versions.latest_version == VersionProviderFromTags(repo).get_latest_version()
+    assert listed_versions.next_version == expected_version
+    assert listed_versions.error is None
+
+    tag_version(repo, expected_version)
+    listed_versions = get_listed_versions(list_refs().splitlines(), branch=repo.active_branch.name)
+    assert listed_versions.current_version == expected_version
+    assert listed_versions.next_version == expected_version
+
+
+def test_get_listed_versions_of_head(repo_from_template):
+    repo = repo_from_template("continuous-deployment-develop")
+    listing = repo.git.ls_remote(repo.working_tree_dir).splitlines()
+    master_sha = repo.heads["master"].commit.hexsha
+
+    listed_versions = get_listed_versions(listing)
+    assert (listed_versions.branch, listed_versions.commit_sha) == (repo.active_branch.name, repo.head.commit.hexsha)
+
+    listed_versions = get_listed_versions(listing, commit_sha=master_sha)
+    assert (listed_versions.branch, listed_versions.current_version) == ("master", Version.parse("0.0.0"))
+
+    with pytest.raises(ProvideVersionError):
+        get_listed_versions([line for line in listing if not line.endswith("HEAD")])
+    with pytest.raises(ProvideVersionError):
+        get_listed_versions(listing, branch="no-such-branch")
+
+
+def test_refs_command_of_a_listing_of_tags(repo_from_template):
+    repo = repo_from_template("continuous-deployment-develop")
+    listing = repo.git.ls_remote(repo.working_tree_dir, tags=True)
+    head_sha = repo.head.commit.hexsha
+
+    def refs(*arguments: str) -> dict:
+        result = subprocess.run(
+            [sys.executable, "-m", "scripts.release.version", "refs", *arguments],
+            input=listing, check=True, capture_output=True, text=True,
+        )
+        return json.loads(result.stdout)
+
+    record = refs()
+    assert (record["commit"], record["current"], record["next"]) == (None, None, None)
+    assert "does not list HEAD" in record["error"]
+
+    record = refs("--commit", head_sha, "--branch", repo.active_branch.name)
+    assert (record["commit"], record["error"]) == (head_sha, None)
+    listed_versions = get_listed_versions(listing.splitlines(), branch=repo.active_branch.name, commit_sha=head_sha)
+    assert record["next"] == listed_versions.next_version.text
+
+
+def test_read_ref_listing():
+    head_sha, snapshot = read_ref_listing(
+        [
+            "1111111111111111111111111111111111111111\tHEAD",
+            "1111111111111111111111111111111111111111\trefs/heads/master",
+            "2222222222222222222222222222222222222222 refs/remotes/origin/develop",
+            "3333333333333333333333333333333333333333 refs/remotes/origin/master",
+            "4444444444444444444444444444444444444444\trefs/tags/v0.1.0",
+            "1111111111111111111111111111111111111111\trefs/tags/v0.1.0^{}",
+            "2222222222222222222222222222222222222222\trefs/tags/v0.2.0-rc1",
+            "2222222222222222222222222222222222222222\trefs/tags/not-a-version",
+            "",
+        ]
+    )
+    assert head_sha == "1" * 40
+    assert snapshot.branches == {"master": "1" * 40, "develop": "2" * 40}
+    assert [(tag.name, tag.commit_sha) for tag in snapshot.tags] == [("v0.1.0", "1" * 40), ("v0.2.0-rc1", "2" * 40)]
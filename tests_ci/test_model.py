@@ -0,0 +1,109 @@
+from pathlib import Path
+
+from git import Repo
+from poetry.core.semver import Version
+import pytest
+
+from scripts.release.version._version._commands import (
+    get_version, preview_versions, record_resolution, replay_resolution, ResolutionRecord, tag_version
+)
+from scripts.release.version._version._model import BranchingModel, BranchingModelError, get_branching_model
+from scripts.release.version._version._resolvers import (
+    ContinuousDeploymentVersionResolver, GitFlowReleaseVersionResolver, VersionResolutionError
+)
+from scripts.release.version._version._stages import Stage
+from .fixtures import add_change
+
+MAIN_MODEL = """[tool.poetry]
+name = "a-package"
+
+[tool.version]
+flow = "git-flow"
+release-branch-pattern = "^release/(?P<version>\\\\d+\\\\.\\\\d+)$"
+
+[tool.version.branches]
+topic = { stage = "alpha" }
+develop = { stage = "alpha", full-name = true }
+release = { stage = "rc" }
+main = { stage = "release", full-name = true }
+"""
+
+
+def test_branching_model_lookup_table():
+    model = BranchingModel.from_config({
+        "flow": "continuous-deployment",
+        "branches": {"trunk": {"stage": "release", "full-name": True}, "topic": {"stage": "alpha"}},
+    })
+    resolver_class = model.resolver_class
+    assert issubclass(resolver_class, ContinuousDeploymentVersionResolver)
+    assert resolver_class.get_stage_from_branch("trunk") is Stage.RELEASE
+    assert resolver_class.get_stage_from_branch("topic/something") is Stage.ALPHA
+    assert resolver_class.get_stage_from_branch("random-branch") is None
+    with pytest.raises(VersionResolutionError):
+        resolver_class.get_stage_from_branch("trunk/something")
+    with pytest.raises(VersionResolutionError):
+        resolver_class.get_stage_from_branch("develop")
+
+    # the flows the models derive from are unchanged
+    assert ContinuousDeploymentVersionResolver.get_stage_from_branch("develop") is Stage.ALPHA
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        pytest.param({"flow": "trunk-based"}, id="unknown-flow"),
+        pytest.param({"branches": {"main": {"stage": "beta"}}}, id="unknown-stage"),
+        pytest.param({"release-branch-pattern": "^release/(?P<v>.*)$"}, id="missing-group"),
+        pytest.param({"release-branch-pattern": "^release/(?P<version>.*$"}, id="invalid-pattern"),
+        pytest.param({"flow": "continuous-deployment", "release-branch-pattern": "^(?P<version>.*)$"}, id="no-release"),
+    ],
+)
+def test_invalid_branching_model(config):
+    with pytest.raises(BranchingModelError):
+        BranchingModel.from_config(config)
+
+
+def test_branching_model_is_cached_until_the_file_changes(tmp_path):
+    pyproject_path = tmp_path / "pyproject.toml"
+    assert get_branching_model(pyproject_path) is None
+    pyproject_path.write_text('[tool.poetry]\nname = "a-package"\n')
+    assert get_branching_model(pyproject_path) is None
+
+    pyproject_path.write_text(MAIN_MODEL)
+    model = get_branching_model(pyproject_path)
+    assert get_branching_model(pyproject_path) is model
+    assert model.resolver_class.get_stage_from_branch("main") is Stage.RELEASE
+
+    pyproject_path.write_text(MAIN_MODEL.replace('main = { stage = "release"', 'trunk = { stage = "release"'))
+    assert get_branching_model(pyproject_path).resolver_class.get_stage_from_branch("trunk") is Stage.RELEASE
+
+
+def test_get_version_with_declared_branching_model(repo_from_template):
+    repo: Repo = repo_from_template("empty")
+    (Path(repo.working_tree_dir) / "pyproject.toml").write_text(MAIN_MODEL)
+    repo.git.add("pyproject.toml")
+    repo.index.commit("declare the branching model")
+    repo.git.branch("-m", "main")
+
+    def infer_and_tag(expected: str) -> None:
+        version = get_version(repo, infer=True, include_alpha=True)
+        assert version == Version.parse(expected)
+        tag_version(repo, version)
+
+    infer_and_tag("0.0.0")
+    repo.create_head("develop").checkout()
+    add_change(repo, "some development")
+    infer_and_tag(f"0.1.0-alpha+{repo.head.commit.hexsha[:8]}")
+    repo.create_head("release/0.1").checkout()
+    infer_and_tag("0.1.0-rc1")
+    repo.create_head("topic/something").checkout()
+    add_change(repo, "a topic")
+    infer_and_tag(f"0.2.0-alpha+{repo.head.commit.hexsha[:8]}")
+
+    previews = {preview.branch: preview for preview in preview_versions(repo, include_alpha=True)}
+    assert previews["release/0.1"].version == Version.parse("0.1.0-rc1")
+    assert previews["main"].version == Version.parse("0.0.0")
+
+    record = ResolutionRecord.from_json(record_resolution(repo).to_json())
+    assert issubclass(record.branching_model.resolver_class, GitFlowReleaseVersionResolver)
+    assert replay_resolution(record._replace(version=None)) == record
@@ -5,6 +5,8 @@ import pytest
 from git import Repo
 from poetry.core.semver import Version
 
+from scripts.release.version.benchmark import create_repo, PROVIDERS
+from scripts.release.version._version._index import VersionIndex, VersionMaxima
 from scripts.release.version._version._providers import VersionProviderFromTags
 from scripts.release.version._version._stages import Stage
 
@@ -27,3 +29,52 @@ def test_simple_version_provider(versions: List[Version], stage: Stage, expected
         resolver = VersionProviderFromTags(MagicMock(spec=Repo))
         resolved = resolver.get_latest_version(stage)
         assert (resolved.text if resolved else resolved) == expected
+
+
+@pytest.mark.parametrize(
+    "major, minor, stage, expected",
+    [
+        pytest.param(1, 2, None, "1.2.1+post1", id="latest-of-line"),
+        pytest.param(1, 2, Stage.RELEASE, "1.2.1", id="latest-release-of-line"),
+        pytest.param(1, 2, Stage.RELEASE_CANDIDATE, "1.2.0-rc2", id="latest-rc-of-line"),
+        pytest.param(1, 3, None, "1.3.0-alpha+12345678", id="only-alpha"),
+        pytest.param(1, 3, Stage.RELEASE, None, id="no-release-in-line"),
+        pytest.param(0, 9, None, None, id="before-first-line"),
+        pytest.param(1, 1, None, None, id="gap-between-lines"),
+        pytest.param(3, 0, None, None, id="after-last-line"),
+    ],
+)
+def test_version_provider_latest_version_in_line(major: int, minor: int, stage: Stage, expected: Optional[str]):
+    versions = ["1.2.1+post1", "1.0.0", "2.0.0", "1.2.0-rc2", "1.2.1", "1.2.0-rc1", "1.3.0-alpha+12345678", "1.2.0"]
+    with patch(
+            "scripts.release.version._version._providers.get_versions",
+            return_value=list(map(Version.parse, versions))
+    ):
+        provider = VersionProviderFromTags(MagicMock(spec=Repo))
+        resolved = provider.get_latest_version_in_line(major, minor, stage)
+        assert (resolved.text if resolved else resolved) == expected
+
+
+def test_version_maxima_match_version_index():
+    versions = list(map(Version.parse, [
+        "1.2.1+post1", "1.0.0", "2.0.0", "1.2.0-rc2", "1.2.1", "1.2.0-rc1", "1.3.0-alpha+12345678", "1.2.0",
+        "1.3.0-alpha+87654321", "0.1.0-alpha+12345678", "2.0.0-rc1",
+    ]))
+    index, maxima = VersionIndex(versions), VersionMaxima(versions)
+    for stage in [None, *Stage.__members__.values()]:
+        assert maxima.get_latest_version(stage) == index.get_latest_version(stage)
+        for major, minor in [(0, 1), (1, 0), (1, 1), (1, 2), (1, 3), (2, 0), (3, 0)]:
+            latest_version = maxima.get_latest_version_in_line(major, minor, stage)
+            assert latest_version == index.get_latest_version_in_line(major, minor, stage)
+
+
+def test_streamed_versions_match_listed_versions(tmp_path):
+    repo = create_repo(tmp_path / "repo", 300)
+    providers = {name: provider(repo) for name, provider in PROVIDERS.items()}
+    for stage in [None, *Stage.__members__.values()]:
+        assert len({provider.get_latest_version(stage) for provider in providers.values()}) == 1
+        for major, minor in [(0, 0), (0, 4), (5, 5), (9, 9)]:
+            versions = {provider.get_latest_version_in_line(major, minor, stage) for provider in providers.values()}
+            assert len(versions) == 1
+    assert len({provider.get_current_version() for provider in providers.values()}) == 1
+    repo.close()
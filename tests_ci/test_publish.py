@@ -0,0 +1,123 @@
+from io import BytesIO
+from pathlib import Path
+import tarfile
+from zipfile import ZipFile
+
+import pytest
+
+from scripts.release.version._version._commands import get_artifacts, publish_artifacts, UploadStatus
+
+WHEEL = "ci_with_poetry-0.1.0-py3-none-any.whl"
+SDIST = "ci_with_poetry-0.1.0.tar.gz"
+
+
+METADATA = """Metadata-Version: 2.1
+Name: ci-with-poetry
+Version: 0.1.0
+Summary: Example of Continuous Integration with poetry
+Requires-Python: >=3.7,<4.0
+Classifier: Programming Language :: Python :: 3
+Classifier: Programming Language :: Python :: 3.7
+Requires-Dist: toml (>=0.10.2,<0.11.0)
+Description-Content-Type: text/markdown
+
+# Build and release with Poetry
+"""
+
+
+@pytest.fixture
+def dist_dir(tmp_path) -> Path:
+    with ZipFile(tmp_path / WHEEL, "w") as wheel:
+        wheel.writestr("ci_with_poetry/__init__.py", '__version__ = "0.1.0"\n' * 1000)
+        wheel.writestr("ci_with_poetry-0.1.0.dist-info/METADATA", METADATA)
+
+    with tarfile.open(tmp_path / SDIST, "w:gz") as sdist:
+        for name, content in [("PKG-INFO", METADATA), ("pyproject.toml", "[tool.poetry]\n")]:
+            info = tarfile.TarInfo(f"ci_with_poetry-0.1.0/{name}")
+            info.size = len(content.encode())
+            sdist.addfile(info, BytesIO(content.encode()))
+
+    (tmp_path / "README.md").write_text("not an artifact")
+    return tmp_path
+
+
+def test_get_artifacts(dist_dir):
+    assert [path.name for path in get_artifacts(dist_dir)] == [WHEEL, SDIST]
+
+
+def test_publish_artifacts(dist_dir, package_index):
+    package_index.fail_next(WHEEL, 503, 502)
+    results = publish_artifacts(
+        get_artifacts(dist_dir), repository_url=package_index.upload_url, username="user", password="pwd", backoff=0
+    )
+
+    assert [(result.path.name, result.status, result.attempts) for result in results] == [
+        (WHEEL, UploadStatus.UPLOADED, 3),
+        (SDIST, UploadStatus.UPLOADED, 1),
+    ]
+    assert all(result.throughput > 0 for result in results)
+    assert package_index.files[WHEEL] == (dist_dir / WHEEL).read_bytes()
+    assert package_index.files[SDIST] == (dist_dir / SDIST).read_bytes()
+
+
+@pytest.mark.parametrize(
+    "file_name, file_type, python_version", [(WHEEL, "bdist_wheel", "py3"), (SDIST, "sdist", "source")]
+)
+def test_publish_artifacts_sends_metadata(file_name, file_type, python_version, dist_dir, package_index):
+    publish_artifacts([dist_dir / file_name], repository_url=package_index.upload_url)
+
+    fields = package_index.fields[file_name]
+    assert fields["metadata_version"] == ["2.1"]
+    assert fields["name"] == ["ci-with-poetry"]
+    assert fields["version"] == ["0.1.0"]
+    assert fields["summary"] == ["Example of Continuous Integration with poetry"]
+    assert fields["requires_python"] == [">=3.7,<4.0"]
+    assert fields["classifiers"] == ["Programming Language :: Python :: 3", "Programming Language :: Python :: 3.7"]
+    assert fields["requires_dist"] == ["toml (>=0.10.2,<0.11.0)"]
+    assert fields["description_content_type"] == ["text/markdown"]
+    assert fields["description"] == ["# Build and release with Poetry\n"]
+    assert fields["filetype"] == [file_type]
+    assert fields["pyversion"] == [python_version]
+
+
+def test_publish_artifacts_without_metadata(tmp_path, package_index):
+    with ZipFile(tmp_path / WHEEL, "w") as wheel:
+        wheel.writestr("ci_with_poetry/__init__.py", "")
+    results = publish_artifacts([tmp_path / WHEEL], repository_url=package_index.upload_url)
+    assert results[0].status == UploadStatus.FAILED
+    assert WHEEL not in package_index.upload_attempts
+
+
+def test_publish_artifacts_skips_existing_files(dist_dir, package_index):
+    publish_artifacts([dist_dir / WHEEL], repository_url=package_index.upload_url)
+
+    # the wheel is found in the simple index and is not uploaded again
+    results = publish_artifacts(
+        get_artifacts(dist_dir),
+        repository_url=package_index.upload_url,
+        simple_index_url=package_index.simple_index_url,
+    )
+    assert [(result.path.name, result.status) for result in results] == [
+        (WHEEL, UploadStatus.SKIPPED),
+        (SDIST, UploadStatus.UPLOADED),
+    ]
+    assert package_index.upload_attempts == {WHEEL: 1, SDIST: 1}
+
+    # without the simple index the upload is rejected by the index and skipped
+    results = publish_artifacts([dist_dir / SDIST], repository_url=package_index.upload_url)
+    assert results[0].status == UploadStatus.SKIPPED
+
+
+@pytest.mark.parametrize(
+    "status_codes, expected_attempts",
+    [
+        pytest.param([503, 503, 503], 3, id="retries-exhausted"),
+        pytest.param([403], 1, id="not-retried"),
+    ]
+)
+def test_publish_artifacts_failure(status_codes, expected_attempts, dist_dir, package_index):
+    package_index.fail_next(WHEEL, *status_codes)
+    results = publish_artifacts([dist_dir / WHEEL], repository_url=package_index.upload_url, retries=2, backoff=0)
+    assert results[0].status == UploadStatus.FAILED
+    assert results[0].attempts == expected_attempts
+    assert WHEEL not in package_index.files
@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+from poetry.core.semver import Version
+import pytest
+
+from scripts.release.version._version._commands import get_version, sync_registry, tag_version
+from scripts.release.version._version._index import VersionIndex
+from scripts.release.version._version._providers import VersionProviderFromRegistry
+from scripts.release.version._version._registry import VersionRecord, VersionRegistry
+from scripts.release.version._version._stages import Stage
+from .fixtures import add_change, CONTINUOUS_DEPLOYMENT_STEPS, GIT_FLOW_STEPS
+
+VERSIONS = [
+    "1.2.1+post1", "1.0.0", "2.0.0", "1.2.0-rc2", "1.2.1", "1.2.0-rc1", "1.3.0-alpha+12345678", "1.2.0", "1.2.0-rc10"
+]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    with VersionRegistry(tmp_path / "versions.sqlite") as registry:
+        yield registry
+
+
+@pytest.mark.parametrize("stage", [None, *Stage.__members__.values()])
+@pytest.mark.parametrize("line", [None, (1, 0), (1, 2), (1, 3), (1, 4)])
+def test_registry_latest_version(stage, line, registry):
+    versions = [Version.parse(version) for version in VERSIONS]
+    registry.add_records(VersionRecord("a-package", version, f"{i:040x}", i) for i, version in enumerate(versions))
+    registry.add_records([VersionRecord("another-package", Version.parse("9.0.0"), "f" * 40, 0)])
+
+    index = VersionIndex(versions)
+    expected = index.get_latest_version_in_line(*line, stage) if line else index.get_latest_version(stage)
+    assert registry.get_latest_version("a-package", stage, line=line) == expected
+
+
+def test_registry_provider(registry):
+    registry.add_records(
+        VersionRecord("a-package", Version.parse(version), "a" * 40 if version.startswith("1.2.1") else "b" * 40, 0)
+        for version in VERSIONS
+    )
+    provider = VersionProviderFromRegistry(registry, "a-package", "a" * 40)
+    assert provider.get_current_version() == Version.parse("1.2.1+post1")
+    assert provider.get_latest_version() == Version.parse("2.0.0")
+    assert provider.get_latest_version(Stage.RELEASE_CANDIDATE) == Version.parse("1.2.0-rc10")
+    assert provider.get_latest_version_in_line(1, 2, Stage.RELEASE) == Version.parse("1.2.1")
+
+
+def test_sync_registry_is_incremental(registry, repo_from_template):
+    repo = repo_from_template("continuous-deployment-release-2")
+    assert sync_registry(repo, registry, "a-package") == len(repo.tags)
+    assert sync_registry(repo, registry, "a-package") == 0
+    assert registry.get_commits("a-package")["0.2.0"] == repo.head.commit.hexsha
+
+    add_change(repo, "a patch")
+    tag_version(repo, Version.parse("0.2.1"))
+    assert sync_registry(repo, registry, "a-package") == 1
+    assert registry.get_versions("a-package", repo.head.commit.hexsha) == [Version.parse("0.2.1")]
+
+
+@pytest.mark.parametrize(
+    "continuous_deployment, base, step",
+    [
+        *(pytest.param(False, base, step, id=step.name) for base, step in GIT_FLOW_STEPS),
+        *(pytest.param(True, base, step, id=step.name) for base, step in CONTINUOUS_DEPLOYMENT_STEPS),
+    ],
+)
+def test_get_version_from_registry(continuous_deployment, base, step, repo_from_template, tmp_path):
+    repo = repo_from_template(base)
+    step.change(repo)
+    registry_path = tmp_path / "versions.sqlite"
+    with VersionRegistry(registry_path) as registry:
+        sync_registry(repo, registry, "a-package")
+
+    with patch("scripts.release.version._version._commands._get.CONTINUOUS_DEPLOYMENT", continuous_deployment), patch(
+        "scripts.release.version._version._commands._get.VERSION_REGISTRY_PATH", registry_path
+    ), patch("scripts.release.version._version._commands._get.get_project_name", return_value="a-package"):
+        assert get_version(repo, infer=True, include_alpha=True) == step.expected_version(repo)
@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+from poetry.core.semver import Version
+import pytest
+
+from scripts.release.version._version._commands import (
+    record_resolution, replay_resolution, ReplayRepo, ResolutionRecord
+)
+from scripts.release.version._version._providers import VersionProviderFromSnapshot
+from scripts.release.version._version._resolvers import GitFlowReleaseVersionResolver
+from .fixtures import add_change, CONTINUOUS_DEPLOYMENT_STEPS, GIT_FLOW_STEPS
+
+STEPS = [
+    *(pytest.param(base, step, False, id=step.name) for base, step in GIT_FLOW_STEPS),
+    *(pytest.param(base, step, True, id=step.name) for base, step in CONTINUOUS_DEPLOYMENT_STEPS),
+]
+
+
+@pytest.mark.parametrize("base, step, continuous_deployment", STEPS)
+def test_replay_resolution(base, step, continuous_deployment, repo_from_template):
+    repo = repo_from_template(base)
+    step.change(repo)
+    with patch("scripts.release.version._version._commands._replay.CONTINUOUS_DEPLOYMENT", continuous_deployment):
+        record = record_resolution(repo)
+    assert record.version == step.expected_version(repo)
+
+    replayed_record = ResolutionRecord.from_json(record.to_json())
+    assert replayed_record.to_json() == record.to_json()
+    assert replay_resolution(replayed_record._replace(version=None)) == replayed_record
+
+
+def test_replay_repo_stands_in_for_the_repository(repo_from_template):
+    repo = repo_from_template("git-flow-release-candidate")
+    repo.heads["release/v0.1"].checkout()
+    record = ResolutionRecord.from_json(record_resolution(repo).to_json())
+
+    provider = VersionProviderFromSnapshot(record.snapshot, record.commit_sha, visible=True)
+    resolver = GitFlowReleaseVersionResolver(provider, ReplayRepo(record))
+    assert resolver.branch == "release/v0.1"
+    assert resolver.resolve_version() == record.version == Version.parse("0.1.0-rc1")
+
+
+def test_replay_resolution_of_a_detached_head(repo_from_template):
+    repo = repo_from_template("git-flow-develop")
+    add_change(repo, "an untagged change")
+    repo.git.checkout(repo.head.commit.hexsha)
+    record = ResolutionRecord.from_json(record_resolution(repo).to_json())
+    assert (record.branch, record.version) == ("develop", Version.parse(f"0.1.0-alpha+{record.commit_sha[:8]}"))
+    assert replay_resolution(record._replace(version=None)) == record
+
+    # a commit that is the head of no branch keeps the current version
+    add_change(repo, "a change on no branch")
+    record = ResolutionRecord.from_json(record_resolution(repo).to_json())
+    assert (record.branch, record.version, record.error) == ("head", None, None)
+    assert replay_resolution(record) == record
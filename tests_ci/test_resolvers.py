@@ -1,12 +1,14 @@
-from typing import Optional, Union
+import re
+from typing import List, Optional, Union
 from unittest.mock import Mock, patch
 
 import pytest
 from poetry.core.semver import Version
 
 from scripts.release.version._version._resolvers import (
-    GitFlowReleaseVersionResolver, ContinuousDeploymentVersionResolver, VersionResolutionError
+    GitFlowReleaseVersionResolver, ContinuousDeploymentVersionResolver, StageInfo, VersionResolutionError
 )
+from scripts.release.version._version._stages import Stage
 from .fixtures import DummyVersionProvider
 
 
@@ -101,3 +103,89 @@ def test_continuous_deployment_release_resolver(
             expected_version = Version.parse(expected) if expected else None
             resolver = ContinuousDeploymentVersionResolver(provider, repo)
             assert resolver.resolve_version() == expected_version
+
+
+def test_git_flow_release_resolver_with_provided_release_candidate():
+    provider = DummyVersionProvider.from_string("", "0.1.0-rc1")
+    repo = Mock(head=Mock(commit=Mock(hexsha="0")))
+    with patch(
+        "scripts.release.version._version._resolvers.GitFlowReleaseVersionResolver.get_latest_candidate_version"
+    ) as get_latest_candidate_version:
+        resolver = GitFlowReleaseVersionResolver(
+            provider, repo, branch="develop", commit_sha="0", release_candidate_version=None
+        )
+        assert resolver.resolve_version() == Version.parse("0.2.0-alpha+0")
+
+        resolver = GitFlowReleaseVersionResolver(
+            provider, repo, branch="develop", commit_sha="0", release_candidate_version=Version.parse("0.2.0")
+        )
+        assert resolver.resolve_version() == Version.parse("0.3.0-alpha+0")
+    get_latest_candidate_version.assert_not_called()
+
+
+LINE_VERSIONS = ["1.1.0", "1.1.1", "1.2.0-rc1", "1.2.0", "1.2.1", "1.3.0-rc1", "2.0.0", "2.0.1"]
+
+
+@pytest.mark.parametrize(
+    "branch_name, line_versions, current_version, expected",
+    [
+        pytest.param("support/1.2", LINE_VERSIONS, "", "1.2.2", id="patch"),
+        pytest.param("support/v1.1", LINE_VERSIONS, "", "1.1.2", id="patch-with-v"),
+        pytest.param("support/1.2", LINE_VERSIONS, "1.2.1", "1.2.1", id="patch-tagged"),
+        pytest.param("support/1.3", LINE_VERSIONS, "", "1.3.0", id="release-candidate-of-line"),
+        pytest.param("support/1.2", ["1.2.0", "1.2.1+post1"], "", "1.2.2", id="hotfix-of-line"),
+        pytest.param("support/1.4", LINE_VERSIONS, "", VersionResolutionError(), id="line-never-released"),
+        pytest.param("support/1.2", ["1.2.0-alpha+0"], "", VersionResolutionError(), id="line-only-alpha"),
+        pytest.param("support/old", LINE_VERSIONS, "", VersionResolutionError(), id="wrong-format"),
+    ],
+)
+def test_git_flow_release_resolver_on_support_branch(
+    branch_name: str,
+    line_versions: List[str],
+    current_version: str,
+    expected: Union[str, VersionResolutionError],
+):
+    provider = DummyVersionProvider(
+        Version.parse(current_version) if current_version else None,
+        Version.parse(line_versions[-1]),
+        line_versions=[Version.parse(version) for version in line_versions],
+    )
+    repo = Mock(head=Mock(commit=Mock(hexsha="0")))
+    resolver = GitFlowReleaseVersionResolver(
+        provider, repo, branch=branch_name, commit_sha="0", release_candidate_version=None
+    )
+    if isinstance(expected, VersionResolutionError):
+        with pytest.raises(VersionResolutionError):
+            resolver.resolve_version()
+    else:
+        assert resolver.resolve_version() == Version.parse(expected)
+
+
+class MaintenanceVersionResolver(GitFlowReleaseVersionResolver):
+    branch_to_stage = [
+        *(stage_info for stage_info in GitFlowReleaseVersionResolver.branch_to_stage if stage_info.branch != "support"),
+        StageInfo("maintenance", False, Stage.RELEASE),
+    ]
+    support_branch_pattern = re.compile(r"^maintenance/(?P<major>\d+)\.(?P<minor>\d+)$")
+
+
+def test_git_flow_release_resolver_on_renamed_support_branch():
+    provider = DummyVersionProvider(line_versions=[Version.parse(version) for version in LINE_VERSIONS])
+    repo = Mock(head=Mock(commit=Mock(hexsha="0")))
+
+    resolver = MaintenanceVersionResolver(provider, repo, branch="maintenance/1.2", release_candidate_version=None)
+    assert resolver.resolve_version() == Version.parse("1.2.2")
+    resolver = MaintenanceVersionResolver(provider, repo, branch="maintenance/old", release_candidate_version=None)
+    with pytest.raises(VersionResolutionError):
+        resolver.resolve_version()
+
+
+def test_support_branches_are_only_special_in_git_flow():
+    provider = DummyVersionProvider(Version.parse("1.2.1"))
+    repo = Mock(head=Mock(commit=Mock(hexsha="0")))
+    with pytest.raises(VersionResolutionError):
+        MaintenanceVersionResolver.get_stage_from_branch("support/1.2")
+    assert ContinuousDeploymentVersionResolver.get_stage_from_branch("support/1.2") is None
+    assert ContinuousDeploymentVersionResolver(provider, repo, branch="support/1.2").resolve_version() == Version.parse(
+        "1.2.1"
+    )
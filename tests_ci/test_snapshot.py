@@ -0,0 +1,42 @@
+import tracemalloc
+from typing import List, Tuple
+from unittest.mock import Mock
+
+import pytest
+
+from scripts.release.version._version._snapshot import _get_visible_commits
+
+
+def _repo_with_history(commits: List[Tuple[str, ...]]) -> Mock:
+    # commits are listed parents first, like rev-list --topo-order --reverse --parents
+    return Mock(git=Mock(rev_list=Mock(return_value="\n".join(" ".join(commit) for commit in commits))))
+
+
+def _linear_history(n_commits: int) -> List[Tuple[str, ...]]:
+    return [(f"{i:040x}",) + ((f"{i - 1:040x}",) if i else ()) for i in range(n_commits)]
+
+
+def test_visible_commits_with_merges():
+    #   a - b - d - e
+    #    \- c -/
+    history = [("a",), ("b", "a"), ("c", "a"), ("d", "b", "c"), ("e", "d")]
+    visible = _get_visible_commits(_repo_with_history(history), {"c", "e"}, {"a", "b", "c"})
+    assert visible == {"c": {"a", "c"}, "e": {"a", "b", "c"}}
+
+
+@pytest.mark.parametrize("tagged_every", [1, 10], ids=["all-tagged", "some-tagged"])
+def test_visible_commits_memory_is_linear(tagged_every):
+
+    def peak_memory(n_commits: int) -> int:
+        history = _linear_history(n_commits)
+        repo = _repo_with_history(history)
+        tagged = {commit[0] for i, commit in enumerate(history) if i % tagged_every == 0}
+        tracemalloc.start()
+        visible = _get_visible_commits(repo, {history[-1][0]}, tagged)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert visible[history[-1][0]] == tagged
+        return peak
+
+    # a quadratic growth would multiply the peak memory by 16
+    assert peak_memory(8000) < 6 * peak_memory(2000)
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+from zipfile import ZipFile
+
+import pytest
+
+from scripts.release.version._version._commands import build_zipapp, measure_cold_start
+
+
+@pytest.fixture(scope="module")
+def zipapp_path(tmp_path_factory):
+    return build_zipapp(tmp_path_factory.mktemp("zipapp") / "version.pyz")
+
+
+def test_zipapp_ships_bytecode(zipapp_path):
+    with ZipFile(zipapp_path) as archive:
+        names = set(archive.namelist())
+        assert archive.read("__main__.py").decode().endswith("version.__main__.main()\n")
+    for module in ["version/__main__", "version/_version/_commands/_get", "git/__init__", "poetry/core/__init__"]:
+        assert f"{module}.py" in names
+        assert f"{module}.pyc" in names
+    assert not any("__pycache__" in name for name in names)
+
+
+@pytest.mark.parametrize(
+    "branch, expected", [("master", "0.0.0"), ("release/v0.1", "0.1.0-rc1")],
+)
+def test_zipapp_gets_the_version_of_the_current_directory(branch, expected, zipapp_path, repo_from_template):
+    repo = repo_from_template("git-flow-release-candidate")
+    repo.heads[branch].checkout()
+
+    output = subprocess.run(
+        [sys.executable, str(zipapp_path), "get", "--infer", "--include-alpha"],
+        cwd=repo.working_tree_dir,
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+    assert output == f"{expected}\n"
+
+
+def test_measure_cold_start(zipapp_path, repo_from_template):
+    repo = repo_from_template("git-flow-initial")
+    cold_start = measure_cold_start(zipapp_path, runs=2, cwd=repo.working_tree_dir)
+    assert cold_start.command[1:] == [str(zipapp_path), "get"]
+    assert 0 < cold_start.best <= cold_start.median